@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+The appearance streams of the text fields: filling out the form and the size of the timesheet with an empty cache of
+appearance streams (every stream of a document is created by pypdf once, equal ones are shared in the document)
+compared to a cache which was filled by the timesheets before (core.FillForm()).
+
+    python benchmarks/bench_appearance.py [--sheets 50] [--template form.pdf]
+"""
+
+import argparse
+import io
+import time
+from pypdf import PdfWriter
+from timeforge import core
+from timeforge import template
+import fixture
+
+
+def measure(form_template: template.FormTemplate, sheets: list[tuple[dict, list]], cold: bool) -> tuple[float, float, int]:
+    # fill and write every sheet, the copy of the form is not measured
+    fill, write, size = 0.0, 0.0, 0
+    for form_data, days in sheets:
+        if cold:
+            core._appearances.clear()
+        pdf_writer = PdfWriter(clone_from=form_template.reader)
+        start = time.perf_counter()
+        core.FillTimesheet(pdf_writer, form_template, form_data, days)
+        filled = time.perf_counter()
+        buffer = io.BytesIO()
+        pdf_writer.write(buffer)
+        fill, write, size = fill + filled - start, write + time.perf_counter() - filled, size + len(buffer.getvalue())
+    return fill, write, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sheets', type=int, default=50, help='number of timesheets')
+    fixture.add_template_argument(parser)
+    args = parser.parse_args()
+
+    form_template = fixture.load_template(args)
+
+    sheets = [(user_input.pdf_content(), month.days) for user_input, month in fixture.sheets(args.sheets)]
+
+    measure(form_template, sheets[:1], cold=True)    # warm up the reader of the form template
+    for name, cold in (("empty cache", True), ("filled cache", False)):
+        fill, write, size = measure(form_template, sheets, cold)
+        print(f"{name:13s} fill {fill / args.sheets * 1000:7.2f} ms  write {write / args.sheets * 1000:7.2f} ms  "
+              f"{size / args.sheets / 1024:6.1f} KiB per sheet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Memory use of `timeforge batch --archive` for growing batches.
+
+Renders manifests of increasing size into a zip archive in a single process and prints the wall time and the peak of
+the memory allocated by Python (tracemalloc) on top of the loaded template. The peak must not grow with the number of
+timesheets, only the size of the archive does.
+
+    python benchmarks/bench_archive.py [--rows 50 100 200] [--format zip] [--template form.pdf]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+from timeforge import batch
+import fixture
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[50, 100, 200], help='sizes of the manifests')
+    parser.add_argument('--format', type=str, default='zip', choices=batch.Archive.FORMATS, help='format of the archive')
+    fixture.add_template_argument(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        template = fixture.template_path(args, directory)
+
+        # render one small batch first so the template is parsed and all modules are imported before measuring
+        os.environ["XDG_CACHE_HOME"] = os.path.join(directory, "cache")
+        for rows in [1, *args.rows]:
+            manifest = os.path.join(directory, f"manifest_{rows}.csv")
+            fixture.write_manifest(manifest, rows, output="sheets/sheet_{}.pdf")
+
+            archive = os.path.join(directory, f"sheets_{rows}.{args.format}")
+            tracemalloc.start()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                batch.main([manifest, "--template", template, "--archive", archive, "--archive-format", args.format, "--jobs", "1"])
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            if rows in args.rows:
+                print(f"{rows:6d} timesheets: {elapsed:7.3f} s  peak {peak / 1024:8.0f} KiB  archive {os.path.getsize(archive) / 1024:8.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
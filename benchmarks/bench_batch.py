@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Scaling of `timeforge batch` with the number of processes.
+
+Renders the same manifest with 1, 2, 4, ... processes (up to the number of CPU cores) and prints the wall time and
+the speedup compared to a single process.
+
+    python benchmarks/bench_batch.py [--rows 200] [--template form.pdf]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from timeforge import batch
+import fixture
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200, help='number of timesheets in the manifest')
+    fixture.add_template_argument(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        template = fixture.template_path(args, directory)
+
+        manifest = os.path.join(directory, "manifest.csv")
+        fixture.write_manifest(manifest, args.rows)
+
+        jobs = [1]
+        while jobs[-1] * 2 <= os.cpu_count():
+            jobs.append(jobs[-1] * 2)
+        if jobs[-1] != os.cpu_count():
+            jobs.append(os.cpu_count())
+
+        print(f"{args.rows} timesheets")
+        reference = None
+        for n in jobs:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                batch.main([manifest, "--template", template, "--output-dir", directory, "--jobs", str(n)])
+            elapsed = time.perf_counter() - start
+            reference = reference or elapsed
+            print(f"--jobs {n:3d}: {elapsed:7.3f} s  {args.rows / elapsed:8.1f} sheets/s  speedup {reference / elapsed:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
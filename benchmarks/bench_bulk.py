@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+The NumPy generator (bulk.generate_months) compared to helpers.Month_Dataset for many months.
+
+Both generators are random, so they cannot produce the same days. Instead every generated month is checked against the
+rules (working time, time blocks, pauses, start times, workdays), the same seed must create the same months and the
+averages of both generators are compared. Everything is seeded, so the result of a run never changes. The script exits
+with an error if a rule is broken or the averages differ. The rules are also checked by suite.py (see verify()).
+
+    python benchmarks/bench_bulk.py [--months 2400] [--seed 1]
+"""
+
+import argparse
+import random
+import sys
+import time
+from timeforge import bulk
+from timeforge import helpers
+from timeforge import holidays
+
+
+def hours(t) -> float:
+    return t.hour + t.minute / 60
+
+
+def months_to_check(count: int) -> list[tuple]:
+    """
+    Months of ten years with working times from nothing up to the most which fits into the workdays of the month,
+    including times which end with a shortened time block
+    """
+    months = []
+    for i in range(count):
+        year, month = 2020 + i // 12 % 10, i % 12 + 1
+        workdays = len(helpers.Month_Dataset(year, month, 0, "Tutorium", holidays.get(year), generate=False).workdays())
+        months.append((year, month, (0, 2.5, 10, 20, 40, 60, 80, 8 * workdays)[i % 8], "Tutorium"))
+    return months
+
+
+def check(dataset: helpers.Month_Dataset) -> list[str]:
+    # return a list of the broken rules, the times are compared in whole minutes, so they have to match exactly
+    errors = []
+    days = dataset.days
+    if sum(d.work_minutes for d in days) != round(dataset.total_work_hours * 60):
+        errors.append("working time does not add up")
+    if len({d.date for d in days}) != len(days):
+        errors.append("a day is used twice")
+    for d in days:
+        if d.date.weekday() > 4 or d.date in dataset.feiertage or (d.date.year, d.date.month) != (dataset.year, dataset.month):
+            errors.append(f"{d.date} is not a workday of the month")
+        if not dataset.min_start_time * 60 <= d.start_minutes <= dataset.max_start_time * 60:
+            errors.append(f"start time {d.start_time} out of range")
+        # a day without a pause has one time block, a day with a pause has two
+        if d.work_minutes > (1 if d.pause_minutes == 0 else 2) * dataset.max_timeblock * 60:
+            errors.append(f"{d.work_hours} hours of work without enough pause")
+        if d.pause_minutes != 0 and not dataset.min_pause * 60 <= d.pause_minutes <= dataset.max_pause * 60:
+            errors.append(f"pause {d.pause} out of range")
+        if d.end_minutes != d.start_minutes + d.work_minutes + d.pause_minutes:
+            errors.append("end time does not match")
+    return errors
+
+
+def content(datasets: list) -> list:
+    return [[(d.job, d.date, d.start_minutes, d.end_minutes, d.pause_minutes, d.work_minutes) for d in dataset.days] for dataset in datasets]
+
+
+def verify(months: list[tuple], seed: int) -> list[str]:
+    """
+    Generate the months with bulk.generate_months() and return the broken rules, the same seed has to create the same
+    months
+    """
+    datasets = bulk.generate_months(months, rng=seed)
+    errors = sorted({error for dataset in datasets for error in check(dataset)})
+    if content(datasets) != content(bulk.generate_months(months, rng=seed)):
+        errors.append("the same seed created different months")
+    return errors
+
+
+def summary(datasets: list) -> dict:
+    days = [d for dataset in datasets for d in dataset.days]
+    return {
+        "days per month": len(days) / len(datasets),
+        "pause per day": sum(hours(d.pause) for d in days) / len(days),
+        "start time": sum(hours(d.start_time) for d in days) / len(days),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--months', type=int, default=2400, help='number of generated months')
+    parser.add_argument('--seed', type=int, default=1, help='seed of both generators')
+    args = parser.parse_args()
+
+    months = [(2020 + i % 10, i % 12 + 1, (10, 20, 40, 60, 80)[i % 5], "Tutorium") for i in range(args.months)]
+
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    python = [helpers.Month_Dataset(year, month, total, job, holidays.get(year), rng=rng) for year, month, total, job in months]
+    python_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = bulk.generate_months(months, rng=args.seed)
+    vectorized_time = time.perf_counter() - start
+
+    print(f"{args.months} months")
+    print(f"helpers.Month_Dataset: {python_time:7.3f} s")
+    print(f"bulk.generate_months:  {vectorized_time:7.3f} s  ({python_time / vectorized_time:.1f}x faster)")
+
+    failed = False
+    for name, errors in (("helpers.Month_Dataset", sorted({error for dataset in python for error in check(dataset)})),
+                         ("bulk.generate_months", verify(months + months_to_check(240), args.seed))):
+        for error in errors:
+            print(f"{name}: {error}")
+        failed = failed or len(errors) > 0
+    python_summary, vectorized_summary = summary(python), summary(vectorized)
+    for key in python_summary:
+        print(f"{key:15s} {python_summary[key]:7.3f} {vectorized_summary[key]:7.3f}")
+        failed = failed or abs(python_summary[key] - vectorized_summary[key]) > 0.05 * python_summary[key]
+    if failed:
+        sys.exit("the generators are not equivalent")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Rendering timesheets with appearance streams (the default) compared to --fast-fields, which only stores the values
+and leaves the appearance to the pdf viewer (core.RenderTimesheet(..., fast_fields=True)).
+
+The default path is measured with an empty and with a filled cache of appearance streams (see bench_appearance.py).
+
+    python benchmarks/bench_fast_fields.py [--sheets 50] [--template form.pdf]
+"""
+
+import argparse
+import time
+from timeforge import core
+from timeforge import helpers
+from timeforge import template
+import fixture
+
+
+def measure(form_template: template.FormTemplate, sheets: list[tuple[core.APP_Data, helpers.Month_Dataset]], cold: bool, fast_fields: bool) -> tuple[float, int]:
+    seconds, size = 0.0, 0
+    for user_input, month in sheets:
+        if cold:
+            core._appearances.clear()
+        start = time.perf_counter()
+        size += len(core.RenderTimesheet(user_input, month, form_template, fast_fields=fast_fields))
+        seconds += time.perf_counter() - start
+    return seconds, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sheets', type=int, default=50, help='number of timesheets')
+    fixture.add_template_argument(parser)
+    args = parser.parse_args()
+
+    form_template = fixture.load_template(args)
+
+    sheets = fixture.sheets(args.sheets)
+
+    measure(form_template, sheets[:1], cold=True, fast_fields=False)   # warm up the reader of the form template
+    for name, cold, fast_fields in (("appearance streams, empty cache", True, False),
+                                    ("appearance streams, filled cache", False, False),
+                                    ("--fast-fields", False, True)):
+        seconds, size = measure(form_template, sheets, cold, fast_fields)
+        print(f"{name:34s} {seconds / args.sheets * 1000:7.2f} ms  {size / args.sheets / 1024:6.1f} KiB per sheet")
+
+
+if __name__ == "__main__":
+    main()
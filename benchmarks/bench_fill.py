@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Filling out the form: one update_page_form_field_values() call per field (the former loop) compared to core.FillForm().
+
+    python benchmarks/bench_fill.py [--repeat 20] [--template form.pdf]
+"""
+
+import argparse
+import time
+from pypdf import PdfWriter
+from timeforge import core
+from timeforge import template
+import fixture
+
+
+def fill_per_field(pdf_writer: PdfWriter, form_template: template.FormTemplate, form_data: dict):
+    for field in form_template.reader.get_form_text_fields():
+        if field in form_data:
+            pdf_writer.update_page_form_field_values(pdf_writer.pages[0], {field: form_data[field]})
+
+
+def measure(fill, form_template: template.FormTemplate, form_data: dict, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        pdf_writer = PdfWriter(clone_from=form_template.reader)
+        start = time.perf_counter()
+        fill(pdf_writer, form_template, form_data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20, help='number of measurements, the best one is reported')
+    fixture.add_template_argument(parser)
+    args = parser.parse_args()
+
+    form_template = fixture.load_template(args)
+    form_data = {field: f"{i:02d}:00" for i, field in enumerate(form_template)}
+
+    per_field = measure(fill_per_field, form_template, form_data, args.repeat)
+    one_pass = measure(core.FillForm, form_template, form_data, args.repeat)
+    print(f"{len(form_template)} fields")
+    print(f"one call per field: {per_field * 1000:8.2f} ms")
+    print(f"core.FillForm:      {one_pass * 1000:8.2f} ms  ({per_field / one_pass:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
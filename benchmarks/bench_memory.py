@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Memory used by the generated working days (helpers.Month_Dataset and helpers.Day), measured with tracemalloc.
+
+    python benchmarks/bench_memory.py [--months 10000]
+"""
+
+import argparse
+import gc
+import tracemalloc
+from timeforge import helpers
+from timeforge import holidays
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--months', type=int, default=10000, help='number of generated months')
+    args = parser.parse_args()
+
+    months = [(2020 + i % 10, i % 12 + 1, (10, 20, 40, 60, 80)[i % 5]) for i in range(args.months)]
+    for year in range(2020, 2030):
+        holidays.get(year)  # calculate the holidays before the measurement starts
+
+    gc.collect()
+    tracemalloc.start()
+    datasets = [helpers.Month_Dataset(year, month, total, "Tutorium", holidays.get(year)) for year, month, total in months]
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    days = sum(len(d.days) for d in datasets)
+    print(f"{args.months} months, {days} days")
+    print(f"retained: {current / 2**20:8.2f} MiB  ({current / days:6.1f} bytes per day)")
+    print(f"peak:     {peak / 2**20:8.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
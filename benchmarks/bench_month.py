@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Generation of the working days (helpers.Month_Dataset) for all months of a decade.
+
+The working time ranges from a few hours up to the capacity of the month (two time blocks on every workday), where
+drawing random days until a free one is found used to degrade.
+
+    python benchmarks/bench_month.py [--repeat 5] [--first-year 2020]
+"""
+
+import argparse
+import time
+from timeforge import helpers
+from timeforge import holidays
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='number of measurements, the best one is reported')
+    parser.add_argument('--first-year', type=int, default=2020, help='first year of the decade')
+    args = parser.parse_args()
+
+    years = range(args.first_year, args.first_year + 10)
+
+    for hours in (10, 20, 40, 60, 80, 100):
+        best, skipped = float("inf"), 0
+        for _ in range(args.repeat):
+            skipped = 0
+            start = time.perf_counter()
+            for year in years:
+                for month in range(1, 13):
+                    try:
+                        helpers.Month_Dataset(year, month, hours, "Tutorium", holidays.get(year))
+                    except ValueError:
+                        skipped += 1    # the working time does not fit into this month
+            best = min(best, time.perf_counter() - start)
+        print(f"{hours:4d} hours: {best / 120 * 1e6:8.1f} µs per month" + (f"  ({skipped} months too short)" if skipped else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Latency and throughput of `timeforge serve`.
+
+Starts the server on a free port with the local fixture as template, sends the same number of requests from every
+client (one keep-alive connection per client) and prints the latency seen by the clients together with the counters
+of the server (GET /stats). Compare it with the time of a `timeforge` process per timesheet (see bench_startup.py).
+
+    python benchmarks/bench_serve.py [--requests 200] [--clients 4] [--jobs 0] [--template form.pdf]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import fixture
+
+
+def client(port: int, count: int, latencies: list, statuses: dict):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    body = json.dumps({"name": "Max Mustermann", "month": 3, "year": 2024, "time": 40, "personell": 1234567,
+                       "salary": 12.5, "organisation": "PSE", "job": "Tutorium"})
+    for _ in range(count):
+        start = time.perf_counter()
+        connection.request("POST", "/timesheet", body, {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='number of requests per client')
+    parser.add_argument('--clients', type=int, default=4, help='number of concurrent clients')
+    parser.add_argument('--jobs', type=int, default=0, help='number of worker processes of the server, 0 uses all CPU cores')
+    fixture.add_template_argument(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        template = fixture.template_path(args, directory)
+
+        environment = dict(os.environ, XDG_CACHE_HOME=os.path.join(directory, "cache"))
+        # enough pending requests for all clients, this benchmark measures the throughput and not the backpressure
+        server = subprocess.Popen(
+            [sys.executable, "-m", "timeforge", "serve", "--port", "0", "--jobs", str(args.jobs),
+             "--max-pending", str(args.clients), "--template", template],
+            stdout=subprocess.PIPE, text=True, env=environment)
+        try:
+            port = int(server.stdout.readline().rsplit(":", 1)[1])
+
+            latencies, statuses = [], {}
+            threads = [threading.Thread(target=client, args=(port, args.requests, latencies, statuses)) for _ in range(args.clients)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            connection = http.client.HTTPConnection("127.0.0.1", port)
+            connection.request("GET", "/stats")
+            stats = json.loads(connection.getresponse().read())
+        finally:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"{total} requests from {args.clients} clients in {elapsed:.3f} s: {total / elapsed:.1f} timesheets/s, status codes {statuses}")
+    print(f"client latency   p50 {1000 * latencies[total // 2]:7.1f} ms  p95 {1000 * latencies[int(0.95 * total)]:7.1f} ms  max {1000 * latencies[-1]:7.1f} ms")
+    print(f"server counters  {json.dumps(stats)}")
+
+
+if __name__ == "__main__":
+    main()
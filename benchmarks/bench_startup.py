@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Startup time of the command line interface: `timeforge --help` and a tab-completion request of argcomplete.
+
+Both must not load the heavy dependencies (pypdf, requests, feiertage), which is checked with `python -X importtime`.
+The script exits with an error if one of them is loaded or a measurement exceeds its budget.
+
+    python benchmarks/bench_startup.py [--repeat 10] [--budget-help 0.2] [--budget-complete 0.2]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HEAVY_MODULES = ("pypdf", "requests", "feiertage")
+
+
+def run(arguments: list[str], env: dict | None = None) -> tuple[float, str]:
+    # return the wall time of the process and its -X importtime report
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-m", "timeforge", *arguments],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env={**os.environ, **(env or {})})
+    return time.perf_counter() - start, result.stderr
+
+
+def imported_heavy_modules(importtime: str) -> set[str]:
+    modules = set()
+    for line in importtime.splitlines():
+        name = line.rsplit("|", 1)[-1].strip()
+        if name.split(".")[0] in HEAVY_MODULES:
+            modules.add(name.split(".")[0])
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10, help='number of measurements, the best one is reported')
+    parser.add_argument('--budget-help', type=float, default=0.2, help='maximal time in seconds for timeforge --help')
+    parser.add_argument('--budget-complete', type=float, default=0.2, help='maximal time in seconds for a completion request')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        completion = {
+            "_ARGCOMPLETE": "1",
+            "COMP_LINE": "timeforge --te",
+            "COMP_POINT": "14",
+            "_ARGCOMPLETE_STDOUT_FILENAME": os.path.join(directory, "completion"),
+        }
+        failed = False
+        for name, arguments, env, budget in (
+            ("timeforge --help", ["--help"], None, args.budget_help),
+            ("timeforge batch --help", ["batch", "--help"], None, args.budget_help),
+            ("completion of --te", [], completion, args.budget_complete),
+        ):
+            measurements = [run(arguments, env) for _ in range(args.repeat)]
+            best = min(elapsed for elapsed, _ in measurements)
+            heavy = imported_heavy_modules(measurements[0][1])
+            status = "ok" if best <= budget and not heavy else "FAILED"
+            failed = failed or status != "ok"
+            print(f"{name:24s} {best * 1000:7.1f} ms  (budget {budget * 1000:.0f} ms)  {status}")
+            if heavy:
+                print(f"    loads {', '.join(sorted(heavy))}")
+    if failed:
+        sys.exit("startup regression")
+
+
+if __name__ == "__main__":
+    main()
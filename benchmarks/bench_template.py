@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Providing the form template: download into the cache (cold) and loading from the cache (warm), each followed by
+parsing the form. The template is served from a local HTTP server, so no internet connection is needed.
+
+Besides the time, the peak of the memory allocated by Python (tracemalloc) is reported as a multiple of the template
+size, which shows how many copies of the template are made on the way.
+
+    python benchmarks/bench_template.py [--size 1048576] [--repeat 5]
+"""
+
+import argparse
+import http.server
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from timeforge import template
+import fixture
+
+
+def measure(url: str, repeat: int, clear_cache: bool) -> tuple[float, int]:
+    best_time, best_peak = float("inf"), 0
+    for _ in range(repeat):
+        if clear_cache:
+            for name in os.listdir(template.cache_dir()):
+                os.remove(os.path.join(template.cache_dir(), name))
+        template._loaded.clear()
+        template._parsed.clear()
+        tracemalloc.start()
+        start = time.perf_counter()
+        template.parse(template.load(url))
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if elapsed < best_time:
+            best_time, best_peak = elapsed, peak
+    return best_time, best_peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1 << 20, help='approximate size of the template in bytes')
+    parser.add_argument('--repeat', type=int, default=5, help='number of measurements, the best one is reported')
+    args = parser.parse_args()
+
+    content = fixture.build_form(padding=args.size)
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(content)))
+            self.send_header("ETag", '"fixture"')
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/form.pdf"
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["XDG_CACHE_HOME"] = directory
+        os.makedirs(template.cache_dir())
+        print(f"template: {len(content) / 1024:.0f} KiB")
+        for name, clear_cache in (("download", True), ("cached", False)):
+            elapsed, peak = measure(url, args.repeat, clear_cache)
+            print(f"{name:9s} {elapsed * 1000:8.2f} ms   peak {peak / 1024:8.0f} KiB  ({peak / len(content):.1f}x template size)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
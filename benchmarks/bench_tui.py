@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+The bytes the curses user interface (timeforge-tui) writes to the terminal per keystroke. The interface runs in a
+pseudo terminal, the keys are typed one by one (waiting for the screen to settle after every key) and once more as a
+burst, as it arrives from a paste or over a slow SSH connection.
+
+    python benchmarks/bench_tui.py [--text "Max Mustermann"] [--term xterm-256color] [--size 24 80]
+"""
+
+import argparse
+import fcntl
+import os
+import pty
+import select
+import signal
+import struct
+import sys
+import termios
+
+
+def settle(fd: int, timeout: float = 0.3) -> int:
+    # read everything the interface writes until it stays quiet for `timeout` seconds
+    size = 0
+    while select.select([fd], [], [], timeout)[0]:
+        try:
+            data = os.read(fd, 65536)
+        except OSError:
+            break
+        if not data:
+            break
+        size += len(data)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--text', type=str, default="Max Mustermann", help='text typed into the name field')
+    parser.add_argument('--term', type=str, default="xterm-256color", help='value of $TERM for the interface')
+    parser.add_argument('--size', type=int, nargs=2, default=[24, 80], metavar=('LINES', 'COLUMNS'), help='size of the terminal')
+    args = parser.parse_args()
+
+    pid, fd = pty.fork()
+    if pid == 0:
+        fcntl.ioctl(sys.stdout.fileno(), termios.TIOCSWINSZ, struct.pack("HHHH", *args.size, 0, 0))
+        os.environ["TERM"] = args.term
+        os.execvp(sys.executable, [sys.executable, "-c", "from timeforge import gui; gui.tui()"])
+
+    try:
+        startup = settle(fd, timeout=1.0)
+        print(f"initial screen               {startup:7d} bytes")
+
+        # type into the name field, one key after the other
+        typed = [settle(fd) for _ in (os.write(fd, char.encode()) for char in args.text)]
+        print(f"typing, per key              {sum(typed) / len(typed):7.1f} bytes")
+
+        deleted = [settle(fd) for _ in (os.write(fd, b"\x7f") for _ in args.text)]
+        print(f"backspace, per key           {sum(deleted) / len(deleted):7.1f} bytes")
+
+        # move through the form and back (the interface switches the keypad of the terminal to the application mode)
+        moved = [settle(fd) for _ in (os.write(fd, key) for key in [b"\t"] * 3 + [b"\x1bOD"] * 3)]
+        print(f"switching fields, per key    {sum(moved) / len(moved):7.1f} bytes")
+
+        os.write(fd, args.text.encode())
+        burst = settle(fd)
+        print(f"burst of {len(args.text):3d} keys, per key     {burst / len(args.text):7.1f} bytes")
+    finally:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Validation of the user input (core.APP_Data) for many records, e.g. a large batch manifest or a busy server.
+
+Compares one set() call per key with APP_Data.from_mapping(), which validates the whole record in one pass. The
+values are strings, like the cells of a CSV manifest.
+
+    python benchmarks/bench_validation.py [--records 100000] [--repeat 3]
+"""
+
+import argparse
+import time
+from timeforge import core
+
+
+def records(count: int) -> list[dict]:
+    return [{
+        "name": f"Person {i}", "month": str(i % 12 + 1), "year": str(2020 + i % 5), "time": "40", "personell": str(1000000 + i),
+        "salary": "12.50", "organisation": "PSE", "jobs": ["Tutorium"], "output": f"sheet_{i}.pdf", "seed": str(i),
+    } for i in range(count)]
+
+
+def per_key(record: dict) -> core.APP_Data:
+    user_input = core.APP_Data()
+    for key, value in record.items():
+        user_input.set(key, value)
+    return user_input
+
+
+def measure(validate, rows: list[dict], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in rows:
+            validate(row).pdf_content()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=100000, help='number of validated records')
+    parser.add_argument('--repeat', type=int, default=3, help='number of measurements, the best one is reported')
+    args = parser.parse_args()
+
+    rows = records(args.records)
+    print(f"{args.records} records, validated and turned into the content of the pdf")
+    results = [("one set() per key", measure(per_key, rows, args.repeat))]
+    if hasattr(core.APP_Data, "from_mapping"):
+        results.append(("APP_Data.from_mapping()", measure(core.APP_Data.from_mapping, rows, args.repeat)))
+    for name, seconds in results:
+        print(f"{name:25s} {seconds:7.3f} s  {seconds / args.records * 1e6:6.2f} µs per record")
+
+
+if __name__ == "__main__":
+    main()
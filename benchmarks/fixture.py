@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+A local stand-in for the PSE form, so the benchmarks run without network access.
+
+The document has one page with the same text field names as the online form (the header fields from
+core.APP_Data.translation_table and six fields per table row). Pass the real form with --template to the benchmarks
+to measure against it instead.
+
+Besides the form, this module provides the inputs the benchmarks share: the --template argument, datasets for
+timesheets and manifests for `timeforge batch`.
+"""
+
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+from pypdf import PdfWriter
+from pypdf.generic import ArrayObject, DecodedStreamObject, DictionaryObject, FloatObject, NameObject, NumberObject, TextStringObject
+from timeforge import core
+from timeforge import helpers
+from timeforge import holidays
+from timeforge import template
+
+HEADER_FIELDS = [
+    'GF', 'abc', 'abdd', 'Std', 'Summe', 'monatliche SollArbeitszeit', 'Personalnummer', 'Stundensatz', 'OE', 'undefined',
+    'Ich bestätige die Richtigkeit der Angaben', 'Urlaub anteilig', 'Übertrag vom Vormonat', 'Übertrag in den Folgemonat',
+]
+TABLE_ROWS = 22
+
+
+def field_names(rows: int = TABLE_ROWS) -> list[str]:
+    names = list(HEADER_FIELDS)
+    for n in range(1, rows + 1):
+        names += [f'Tätigkeit Stichwort ProjektRow{n}', f'ttmmjjRow{n}', f'hhmmRow{n}', f'hhmmRow{n}_2', f'hhmmRow{n}_3', f'hhmmRow{n}_4']
+    return names
+
+
+def build_form(rows: int = TABLE_ROWS, padding: int = 0) -> bytes:
+    """
+    Create the form and return the content of the PDF file.
+    `padding` bytes of random data are embedded as a stream to get the size of a real document with fonts and images
+    """
+    writer = PdfWriter()
+    page = writer.add_blank_page(595, 842)
+    font = writer._add_object(DictionaryObject({
+        NameObject('/Type'): NameObject('/Font'),
+        NameObject('/Subtype'): NameObject('/Type1'),
+        NameObject('/BaseFont'): NameObject('/Helvetica'),
+        NameObject('/Encoding'): NameObject('/WinAnsiEncoding'),
+    }))
+    annotations = ArrayObject()
+    for i, name in enumerate(field_names(rows)):
+        # six fields per line, from the top of the page downwards
+        x, y = 20 + (i % 6) * 90, 800 - (i // 6) * 14
+        annotations.append(writer._add_object(DictionaryObject({
+            NameObject('/Type'): NameObject('/Annot'),
+            NameObject('/Subtype'): NameObject('/Widget'),
+            NameObject('/FT'): NameObject('/Tx'),
+            NameObject('/T'): TextStringObject(name),
+            NameObject('/Rect'): ArrayObject([FloatObject(x), FloatObject(y), FloatObject(x + 85), FloatObject(y + 12)]),
+            NameObject('/DA'): TextStringObject('/Helv 0 Tf 0 g'),
+            NameObject('/F'): NumberObject(4),
+            NameObject('/P'): page.indirect_reference,
+        })))
+    page[NameObject('/Annots')] = annotations
+    writer._root_object[NameObject('/AcroForm')] = writer._add_object(DictionaryObject({
+        NameObject('/Fields'): ArrayObject(annotations),
+        NameObject('/DR'): DictionaryObject({NameObject('/Font'): DictionaryObject({NameObject('/Helv'): font})}),
+        NameObject('/DA'): TextStringObject('/Helv 0 Tf 0 g'),
+    }))
+    if padding > 0:
+        stream = DecodedStreamObject()
+        stream.set_data(os.urandom(padding))
+        writer._root_object[NameObject('/Padding')] = writer._add_object(stream)
+    with io.BytesIO() as buffer:
+        writer.write(buffer)
+        return buffer.getvalue()
+
+
+def add_template_argument(parser: argparse.ArgumentParser):
+    """
+    Add the --template argument, see load_template() and template_path()
+    """
+    parser.add_argument('--template', type=str, help='PDF form to use instead of the local fixture')
+
+
+def load_template(args: argparse.Namespace) -> template.FormTemplate:
+    """
+    Parse the form given with --template, or the local fixture without it
+    """
+    if args.template is not None:
+        with open(args.template, "rb") as f:
+            content = f.read()
+    else:
+        content = build_form()
+    return template.FormTemplate(content)
+
+
+def template_path(args: argparse.Namespace, directory: str) -> str:
+    """
+    Return the path of the form given with --template for the command line of timeforge. Without it the local fixture
+    is written into `directory`
+    """
+    if args.template is not None:
+        return args.template
+    path = os.path.join(directory, "form.pdf")
+    with open(path, "wb") as f:
+        f.write(build_form())
+    return path
+
+
+def sheets(n: int, seed: int = 1) -> list[tuple[core.APP_Data, helpers.Month_Dataset]]:
+    """
+    Create the datasets and working days of `n` timesheets for different persons and months. The same seed always
+    creates the same timesheets
+    """
+    rng = random.Random(seed)
+    result = []
+    for i in range(n):
+        year, month = 2020 + i % 5, i % 12 + 1
+        user_input = core.APP_Data.from_mapping({
+            "name": f"Person {i}", "month": month, "year": year, "time": 20 + i % 40, "personell": 1000000 + i,
+            "salary": "12.50", "organisation": "PSE", "jobs": ["Tutorium"],
+        })
+        result.append((user_input, helpers.Month_Dataset(year, month, 20 + i % 40, "Tutorium", holidays.get(year), rng=rng)))
+    return result
+
+
+def write_manifest(path: str, rows: int, output: str = "sheet_{}.pdf"):
+    """
+    Write a CSV manifest for `timeforge batch` with `rows` timesheets, `output` is formatted with the number of the row
+    """
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "month", "year", "time", "personell", "salary", "organisation", "job", "output"])
+        for i in range(rows):
+            writer.writerow([f"Person {i}", i % 12 + 1, 2020 + i % 5, 40, 1000000 + i, "12.50", "PSE", "Tutorium", output.format(i)])
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1] if len(sys.argv) > 1 else "form.pdf", "wb") as f:
+        f.write(build_form())
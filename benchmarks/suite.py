@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Regression suite for the hot paths: generation of the working days, the user input, filling the form and rendering
+complete timesheets against the local fixture (no network access).
+
+Every case is measured several times, the best time per call is compared with the committed baseline
+(benchmarks/baseline.json). The script exits with an error if a case got slower than the tolerance allows. The
+times are divided by the speed of the machine, measured with a fixed pure Python workload, so a baseline stays usable
+on a slower or busier machine. After a change of the Python version record a new one with --save.
+
+The months of the NumPy generator (bulk.generate_months) are checked against the rules of the working times as well
+(see bench_bulk.py), a broken rule also makes the script exit with an error. The check is skipped without NumPy.
+
+    python benchmarks/suite.py [--repeat 5] [--tolerance 1.5] [--filter month] [--save] [--template form.pdf]
+
+or `make bench` from the root of the repository.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from pypdf import PdfWriter
+from timeforge import bulk
+from timeforge import core
+from timeforge import helpers
+from timeforge import holidays
+from timeforge import template
+import bench_bulk
+import fixture
+
+# the name of the check of the NumPy generator, it can be selected with --filter like the measured cases
+BULK_RULES = "bulk.generate_months[rules]"
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# the year of the measured months, 2024 has a leap day and holidays on weekdays and weekends
+YEAR = 2024
+
+USER_INPUT = {
+    "name": "Max Mustermann", "month": 3, "year": YEAR, "time": 40, "personell": 1234567, "salary": "12.50",
+    "organisation": "PSE", "jobs": ["Tutorium"], "output": "timesheet.pdf", "seed": 1,
+}
+
+
+def user_input(**changes) -> core.APP_Data:
+    data = core.APP_Data()
+    for key, value in {**USER_INPUT, **changes}.items():
+        data.set(key, value)
+    return data
+
+
+def cases(form_template: template.FormTemplate, overflow_template: template.FormTemplate) -> dict:
+    """
+    Every case is a pair of functions: setup() creates the arguments of one call outside of the measurement and
+    run(*arguments) is measured
+    """
+    feiertage = holidays.get(YEAR)
+    suite = dict()
+
+    # all twelve months for a range of working times, months without enough workdays are skipped in the setup
+    for hours in (10, 40, 80):
+        months = []
+        for month in range(1, 13):
+            try:
+                helpers.Month_Dataset(YEAR, month, hours, "Tutorium", feiertage)
+                months.append(month)
+            except ValueError:
+                pass
+
+        def generate(rng, hours=hours, months=tuple(months)):
+            for month in months:
+                helpers.Month_Dataset(YEAR, month, hours, "Tutorium", feiertage, rng=rng)
+        suite[f"month_dataset[{hours}h, 12 months]"] = (lambda: (random.Random(1),), generate)
+
+    suite["app_data.set"] = (lambda: (), user_input)
+    data = user_input()
+    suite["app_data.pdf_content"] = (lambda: (), data.pdf_content)
+
+    form_data = data.pdf_content()
+    days = helpers.Month_Dataset(YEAR, 3, 40, "Tutorium", feiertage, rng=random.Random(1)).days
+    form_data.update(core.TableContent(days))
+    suite["fill_form"] = (lambda: (PdfWriter(clone_from=form_template.reader), form_template, form_data), core.FillForm)
+
+    # a month with more working days than the table has rows, the table is continued on further pages
+    long_days = helpers.Month_Dataset(YEAR, 3, 100, "Tutorium", feiertage, rng=random.Random(1)).days
+    suite["fill_timesheet[continuation pages]"] = (
+        lambda: (PdfWriter(clone_from=overflow_template.reader), overflow_template, data.pdf_content(), long_days),
+        core.FillTimesheet)
+
+    suite["render_timesheet"] = (lambda: (data,), lambda data: core.RenderTimesheet(data, form_template=form_template))
+    return suite
+
+
+def reference():
+    # a fixed workload which only depends on the speed of the interpreter and the machine
+    values = [(i * 7919) % 10007 for i in range(20000)]
+    return sorted(str(value) for value in values)
+
+
+def measure(setup, run, repeat: int, minimum: float = 0.05) -> float:
+    # calibrate the number of calls so a measurement takes at least `minimum` seconds, report the best time per call
+    number = 1
+    while True:
+        arguments = [setup() for _ in range(number)]
+        start = time.perf_counter()
+        for args in arguments:
+            run(*args)
+        elapsed = time.perf_counter() - start
+        if elapsed >= minimum or number >= 100_000:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(minimum / elapsed) + 1))
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        arguments = [setup() for _ in range(number)]
+        start = time.perf_counter()
+        for args in arguments:
+            run(*args)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='number of measurements, the best one is reported')
+    parser.add_argument('--tolerance', type=float, default=1.5, help='a case fails if it takes longer than this factor times the baseline')
+    parser.add_argument('--filter', type=str, default='', help='only run the cases whose name contains this text')
+    parser.add_argument('--save', action='store_true', help='write the measured times as new baseline')
+    parser.add_argument('--baseline', type=str, default=BASELINE, help='the file with the baseline')
+    fixture.add_template_argument(parser)
+    args = parser.parse_args()
+
+    form_template = fixture.load_template(args)
+    overflow_template = template.FormTemplate(fixture.build_form(rows=8))
+
+    baseline, baseline_speed = dict(), None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            saved = json.load(f)
+        baseline, baseline_speed = saved["cases"], saved["reference"]
+
+    speed = measure(tuple, reference, args.repeat)
+    # how much slower this machine is at the moment than the one of the baseline
+    scale = speed / baseline_speed if baseline_speed else 1.0
+    print(f"{'reference workload':40s} {speed * 1000:10.3f} ms  {scale:5.2f}x baseline")
+
+    results, regressions = dict(), []
+    for name, (setup, run) in cases(form_template, overflow_template).items():
+        if args.filter not in name:
+            continue
+        seconds = results[name] = measure(setup, run, args.repeat)
+        line = f"{name:40s} {seconds * 1000:10.3f} ms"
+        if name in baseline:
+            ratio = seconds / baseline[name] / scale
+            line += f"  {ratio:5.2f}x baseline (scaled)"
+            if ratio > args.tolerance:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+
+    broken = []
+    if args.filter in BULK_RULES:
+        if bulk.numpy is None:
+            print(f"{BULK_RULES:40s} skipped, NumPy is not installed")
+        else:
+            broken = bench_bulk.verify(bench_bulk.months_to_check(240), seed=1)
+            print(f"{BULK_RULES:40s} {'BROKEN' if broken else 'ok'}")
+            for error in broken:
+                print(f"    {error}")
+
+    if args.save:
+        # the cases of the baseline which were not measured are scaled to the speed of this run
+        saved_cases = {name: seconds * scale for name, seconds in baseline.items()}
+        saved_cases.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "reference": speed, "cases": saved_cases}, f, indent=4)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} of {len(results)} cases slower than {args.tolerance}x the baseline")
+        sys.exit(1)
+    if broken:
+        sys.exit(f"{len(broken)} broken rules in {BULK_RULES}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,39 @@
 #!/usr/bin/env python3
 # PYTHON_ARGCOMPLETE_OK
 
+import argcomplete
 import configargparse
 from datetime import date, timedelta, datetime
-import feiertage
 import os
-from pypdf import PdfReader, PdfWriter
-import requests
+import random
 import sys
-import tempfile
+import time
 from . import helpers
+from . import holidays
 from . import config
 from . import core
+from . import profiling
 
 
 def main():
     """
     This whole script was wrapped into a main function. This behaviour is mandatory to create an installable executable for pip
     """
+    # `timeforge batch manifest.csv` creates many timesheets at once, see the batch module
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from . import batch
+        return batch.main(sys.argv[2:])
+    # `timeforge serve` creates timesheets on request over HTTP, see the serve module
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from . import serve
+        return serve.main(sys.argv[2:])
+
+    started = time.perf_counter()
     parser = configargparse.ArgParser(
         prog='TimeForge',
         description='Create fake but realistic looking working time documentation for your student job at KIT',
-        epilog='For further information take a look at the Repository for this program: '
+        epilog='Use `timeforge batch --help` to create many timesheets at once and `timeforge serve --help` to create them over HTTP. '
+               'For further information take a look at the Repository for this program: '
                'https://github.com/MitchiLaser/timeforge')
     parser.add('-c', '--config', is_config_file=True, help='Location of the config file')
     parser.add('-n', '--name', type=str, required=True, help='Name of the working person')
@@ -36,8 +48,26 @@ def main():
     parser.add('-v', '--verbose', action='store_true', help='more detailed information printing for debugging purpose')
     parser.add('-o', '--output', type=str, required=True, help='Output File where the content will be written to')
     parser.add('-j', '--job', type=str, required=True, help='description of the job task')
+    parser.add('--seed', type=int, help='seed for the random working times, the same seed and arguments always create the same timesheet')
+    parser.add('--fast-fields', action='store_true', help="only store the values of the fields and let the PDF viewer draw them (NeedAppearances): faster and smaller file, but viewers which ignore NeedAppearances (e.g. many previews, browsers and printers) show empty fields")
+    parser.add('--template', type=str, metavar='PATH', help='use a local PDF file as form template instead of the form from the PSE homepage')
+    parser.add('--offline', action='store_true', help='never download the form template, only use the cached copy')
+    parser.add('--cache-ttl', type=float, default=config.TEMPLATE_CACHE_TTL, metavar='SECONDS', help='how long the cached form template is used before the server is asked for a newer version')
+    profiling.add_arguments(parser)
+    argcomplete.autocomplete(parser)
     args = parser.parse_args()
+    parsed = time.perf_counter()
 
+    with profiling.profile(args.profile, args.profile_json, args.profile_stats, command="timeforge") as profiler:
+        if profiler is not None:
+            profiler.record("arguments", parsed - started)
+        run(args)
+
+
+def run(args):
+    """
+    Create the timesheet as described by the command line arguments
+    """
     if args.verbose:
         # print command line arguments
         core.PrintDictAsTable(
@@ -54,6 +84,9 @@ def main():
                 "Verbose": args.verbose,
                 "Output-File": args.output,
                 "Job-task": args.job,
+                "Seed": args.seed,
+                "Template": args.template if args.template is not None else config.MILOG_FORM_URL,
+                "Offline": args.offline,
             },
             "Command Line Arguments",
             "Values"
@@ -61,53 +94,46 @@ def main():
 
     #########################################
 
-    user_input = core.APP_Data()
-    user_input.set("month", args.month)
-    user_input.set("year", args.year)
-    user_input.set("name", args.name)
-    user_input.set("personell", args.personell)
-    user_input.set("organisation", args.organisation)
-    user_input.set("time", args.time)
-    user_input.set("salary", str(args.salary))
-    user_input.set("jobs", [args.job])
-    user_input.set("output", args.output)
-    if len(missing := user_input.missing_keys()) != 0:
-        raise RuntimeError(f"Missing keys in the internal dataset, cannot generate pdf: {missing}")
-    form_data = user_input.pdf_content()
+    with profiling.stage("validation"):
+        user_input = core.APP_Data()
+        user_input.set("month", args.month)
+        user_input.set("year", args.year)
+        user_input.set("name", args.name)
+        user_input.set("personell", args.personell)
+        user_input.set("organisation", args.organisation)
+        user_input.set("time", args.time)
+        user_input.set("salary", str(args.salary))
+        user_input.set("jobs", [args.job])
+        user_input.set("output", args.output)
+        user_input.set("seed", args.seed)
+        if len(missing := user_input.missing_keys()) != 0:
+            raise RuntimeError(f"Missing keys in the internal dataset, cannot generate pdf: {missing}")
+        form_data = user_input.pdf_content()
 
     #########################################
 
     # list of national holidays in the German state "Baden-Württemberg"
-    feiertage_list = feiertage.Holidays(config.FEDERAL_STATE, year=args.year).get_holidays_list()
+    with profiling.stage("holidays"):
+        feiertage_list = holidays.get(args.year)
 
     if args.verbose:
-        core.PrintListAsTable(feiertage_list, "Calculated Holidays")
+        core.PrintListAsTable(sorted(feiertage_list), "Calculated Holidays")
 
     #########################################
 
     # Generate the content for the PDF file
-    # TODO: this should be outsourced into the core module
-    table_row = 1
-    month = helpers.Month_Dataset(args.year, args.month, args.time, args.job, feiertage_list)
-    days = month.days
-    for day in sorted(days):
-        form_data['Tätigkeit Stichwort ProjektRow' + str(table_row)] = day.job
-        form_data["ttmmjjRow" + str(table_row)] = day.date.strftime("%d.%m.%y")
-        form_data["hhmmRow" + str(table_row)] = day.start_time.strftime("%H:%M")
-        form_data["hhmmRow" + str(table_row) + "_2"] = day.end_time.strftime("%H:%M")
-        form_data["hhmmRow" + str(table_row) + "_3"] = day.pause.strftime("%H:%M")
-        form_data["hhmmRow" + str(table_row) + "_4"] = day.work_hours.strftime("%H:%M")
-        table_row += 1
-
-    if args.verbose:
-        core.PrintDictAsTable(form_data, "PDF Form field", "Value")
+    with profiling.stage("generation"):
+        rng = random.Random(args.seed) if args.seed is not None else None
+        month = helpers.Month_Dataset(args.year, args.month, args.time, args.job, feiertage_list, rng=rng)
 
     #########################################
 
-    with core.ProvideOutputFile(args.output) as (WriteInPDF, fields):
-        for field in fields:                    # fill out all the fields in the form
-            if field in form_data:
-                WriteInPDF.update_page_form_field_values(WriteInPDF.pages[0], {field: form_data[field]})
+    # the table is continued on further pages if the month has more working days than the table has rows
+    with core.ProvideOutputFile(args.output, args.template, args.offline, args.cache_ttl) as (WriteInPDF, form_template):
+        form_data = core.FillTimesheet(WriteInPDF, form_template, form_data, month.days, args.fast_fields)
+
+        if args.verbose:
+            core.PrintDictAsTable(form_data, "PDF Form field", "Value")
 
 
 if __name__ == "__main__":
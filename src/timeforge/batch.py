@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Generate many timesheets in a single process.
+
+The manifest is a CSV file (with a header line) or a JSON file (a list of objects). Every row describes one timesheet
+and uses the same keys as the internal dataset (see core.APP_Data): name, month, year, time, personell, salary,
+organisation, job, output and optionally seed. The form template is downloaded and parsed once and the holidays are
+calculated once per year for the whole batch (see the holidays module).
+
+With more than one job the rows are rendered by a pool of processes. Every process receives the template once when it is
+started and keeps its own parsed copy, so only the rows and the results are sent between the processes.
+
+With --archive all timesheets are written into a single zip or tar archive (or to stdout) as soon as they are rendered,
+without intermediate files. Only a few documents are in memory at any time, no matter how large the batch is.
+"""
+
+import collections
+import configargparse
+import contextlib
+import csv
+import hashlib
+import io
+import json
+import os
+import posixpath
+import random
+import sys
+import tarfile
+import time
+import zipfile
+from . import config
+from . import core
+from . import profiling
+from . import template
+
+
+def read_manifest(path: str) -> list[dict]:
+    """
+    Read the rows of a manifest file
+
+    Parameters
+    ----------
+    path : str
+        A manifest file, JSON if the file name ends with '.json', otherwise CSV
+
+    Raises
+    ------
+    ValueError :
+        If a JSON manifest is not a list of objects
+
+    Returns
+    -------
+    rows : list[dict]
+        One dictionary per timesheet
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".json"):
+            rows = json.load(f)
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                raise ValueError("A JSON manifest must contain a list of objects")
+            return rows
+        return [*csv.DictReader(f)]
+
+
+def read_row(row: dict) -> core.APP_Data:
+    """
+    Validate a row of the manifest and turn it into the internal dataset
+
+    Parameters
+    ----------
+    row : dict
+        The row of the manifest. The key 'job' takes a single job description, 'jobs' a list of them
+
+    Raises
+    ------
+    KeyError :
+        If the row contains an unknown key
+    ValueError :
+        If a value in the row is not valid
+
+    Returns
+    -------
+    user_input : core.APP_Data
+        The dataset, it may still miss some keys
+    """
+    record = dict()
+    for key, value in row.items():
+        if key == "job":
+            record["jobs"] = [value]
+        elif value not in (None, ""):  # empty CSV cells keep the default value
+            record[key] = value
+    return core.APP_Data.from_mapping(record)
+
+
+def derive_seed(seed: int, row: dict) -> int:
+    """
+    Derive the seed of a single timesheet from the seed of the whole batch
+
+    The seed depends on the output path of the row and not on its position in the manifest, so adding, removing or
+    reordering rows does not change the other timesheets
+
+    Parameters
+    ----------
+    seed : int
+        The seed of the batch
+    row : dict
+        The row of the manifest
+
+    Returns
+    -------
+    seed : int
+        The seed of the row
+    """
+    digest = hashlib.sha256(f"{seed}:{row.get('output', '')}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def render_row(row: dict, form_template: template.FormTemplate, output_dir: str | None = None, incremental: bool = False, **options) -> tuple[str, bool]:
+    """
+    Create the timesheet for one row of the manifest
+
+    Parameters
+    ----------
+    row : dict
+        The row of the manifest
+    form_template : template.FormTemplate
+        The parsed form template (see core.ReadTemplate()), shared by all rows
+    output_dir : str, optional
+        Relative output paths are interpreted relative to this directory
+    incremental : bool
+        Keep an existing output file if it was created from the same inputs (see core.InputHash())
+    options :
+        Further arguments of core.WriteTimesheet() for the output, e.g. fast_fields
+
+    Raises
+    ------
+    KeyError :
+        If the row contains an unknown key
+    ValueError :
+        If a value in the row is not valid
+    RuntimeError :
+        If the row misses some keys
+
+    Returns
+    -------
+    output : str
+        The path of the created file
+    created : bool
+        False if the existing file was kept
+    """
+    with profiling.stage("validation"):
+        user_input = read_row(row)
+        if len(missing := user_input.missing_keys()) != 0:
+            raise RuntimeError(f"Missing keys in the internal dataset, cannot generate pdf: {missing}")
+    if output_dir is not None:
+        user_input.set("output", os.path.join(output_dir, user_input.get("output")))
+    output = user_input.get("output")
+    if incremental and core.StoredInputHash(output) == core.InputHash(user_input, form_template, **options):
+        return output, False
+    # the output directory and subdirectories in the output paths of the manifest are created when they are missing
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    core.WriteTimesheet(user_input, output, form_template=form_template, **options)
+    return output, True
+
+
+def archive_name(output: str) -> str:
+    """
+    Turn the output path of a row into the name of a file inside an archive
+
+    Parameters
+    ----------
+    output : str
+        The output path from the manifest
+
+    Raises
+    ------
+    ValueError :
+        If the path is absolute or leaves the archive with '..'
+
+    Returns
+    -------
+    name : str
+        The normalised path with '/' as separator
+    """
+    name = posixpath.normpath(output.replace(os.sep, "/"))
+    if name.startswith("/") or name == ".." or name.startswith("../"):
+        raise ValueError(f"Output paths in an archive must be relative and stay inside the archive: {output}")
+    return name
+
+
+def render_member(row: dict, form_template: template.FormTemplate, **options) -> tuple[str, bytes]:
+    """
+    Create the timesheet for one row of the manifest in memory, to be stored in an archive
+
+    Parameters
+    ----------
+    row : dict
+        The row of the manifest, the output column is the name of the file inside the archive
+    form_template : template.FormTemplate
+        The parsed form template (see core.ReadTemplate()), shared by all rows
+    options :
+        Further arguments of core.WriteTimesheet() for the output, e.g. fast_fields
+
+    Raises
+    ------
+    KeyError :
+        If the row contains an unknown key
+    ValueError :
+        If a value in the row is not valid
+    RuntimeError :
+        If the row misses some keys
+
+    Returns
+    -------
+    name : str
+        The name of the file inside the archive
+    content : bytes
+        The pdf document
+    """
+    with profiling.stage("validation"):
+        user_input = read_row(row)
+        if len(missing := user_input.missing_keys()) != 0:
+            raise RuntimeError(f"Missing keys in the internal dataset, cannot generate pdf: {missing}")
+    name = archive_name(user_input.get("output"))
+    return name, core.RenderTimesheet(user_input, form_template=form_template, **options)
+
+
+class Archive:
+    """
+    A zip or tar archive into which the timesheets are written one after the other, without any intermediate files.
+    The archive is written as a stream, so it can also be sent to a pipe
+
+    Parameters
+    ----------
+    path : str
+        The file name of the archive, '-' writes it to stdout
+    archive_format : str, optional
+        'zip', 'tar' or 'tar.gz'. If it is missing the format is taken from the file name, the default is 'zip'
+    """
+
+    FORMATS = ("zip", "tar", "tar.gz")
+
+    def __init__(self, path: str, archive_format: str | None = None):
+        if archive_format is None:
+            archive_format = next((f for f in ("tar.gz", "tar") if path.lower().endswith("." + f)), "zip")
+        if archive_format not in self.FORMATS:
+            raise ValueError(f"Unknown archive format {archive_format}, use one of {', '.join(self.FORMATS)}")
+        self.format = archive_format
+        self.names = set()
+        self.to_stdout = path == "-"
+        self.stream = sys.stdout.buffer if self.to_stdout else open(path, "wb")
+        if archive_format == "zip":
+            # zipfile falls back to data descriptors by itself if the stream cannot seek
+            self.archive = zipfile.ZipFile(self.stream, "w", compression=zipfile.ZIP_DEFLATED)
+        else:
+            self.archive = tarfile.open(fileobj=self.stream, mode="w|gz" if archive_format == "tar.gz" else "w|")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def add(self, name: str, content: bytes):
+        """
+        Append a file to the archive
+
+        Parameters
+        ----------
+        name : str
+            The name of the file inside the archive
+        content : bytes
+            The content of the file
+
+        Raises
+        ------
+        ValueError :
+            If the archive already contains a file with this name
+        """
+        if name in self.names:
+            raise ValueError(f"The archive already contains a file named {name}")
+        self.names.add(name)
+        if self.format == "zip":
+            self.archive.writestr(name, content)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            info.mtime = int(time.time())
+            info.mode = 0o644
+            self.archive.addfile(info, io.BytesIO(content))
+
+    def close(self):
+        """
+        Write the end of the archive and close the file
+        """
+        self.archive.close()
+        if self.to_stdout:
+            self.stream.flush()
+        else:
+            self.stream.close()
+
+
+def _imap(executor, function, items, window: int):
+    # like executor.map(), but at most `window` items are submitted at a time: the results (whole pdf documents when
+    # writing an archive) never pile up in memory if the main process cannot keep up with the workers.
+    # The results are returned in the order of the items
+    pending = collections.deque()
+    for item in items:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# the parsed template of the current (worker) process, set up by _init_worker()
+_form_template = None
+_output_dir = None
+_archive = False
+_incremental = False
+_profiler = None
+_options = {}
+
+
+def _init_worker(content, output_dir: str | None, archive: bool = False, incremental: bool = False, profile: bool = False, options: dict | None = None):
+    global _form_template, _output_dir, _archive, _incremental, _profiler, _options
+    if profile:
+        # the profiler of a worker process stays active for its whole life, the records are sent back with the results
+        _profiler = profiling.Profiler().__enter__()
+    with profiling.stage("template parse"):
+        _form_template = template.parse(content)
+    _output_dir = output_dir
+    _archive = archive
+    _incremental = incremental
+    _options = options or {}
+    # forked worker processes inherit the state of the random number generator, without a new seed they would all
+    # create the same working times for the rows without a seed
+    random.seed()
+
+
+def _render_task(row: dict) -> tuple[bool, tuple[str, bytes] | tuple[str, bool] | str, list[dict]]:
+    # exceptions are returned as text so they never have to be pickled to get back to the main process
+    try:
+        if _archive:
+            success, result = True, render_member(row, _form_template, **_options)
+        else:
+            success, result = True, render_row(row, _form_template, _output_dir, _incremental, **_options)
+    except Exception as e:
+        success, result = False, str(e)
+    return success, result, _profiler.take() if _profiler is not None else []
+
+
+def main(argv: list[str] | None = None):
+    """
+    The entry point for `timeforge batch`
+    """
+    parser = configargparse.ArgParser(
+        prog='TimeForge batch',
+        description='Create the working time documentation for many timesheets at once, described by a CSV or JSON manifest',
+        epilog='The manifest needs the columns name, month, year, time, personell, salary, organisation, job and output.')
+    parser.add('manifest', type=str, help='CSV or JSON file with one row per timesheet')
+    parser.add('-d', '--output-dir', type=str, help='relative output paths in the manifest are interpreted relative to this directory')
+    parser.add('-a', '--archive', type=str, metavar='PATH', help="write all timesheets into a single archive instead of separate files, '-' writes it to stdout. The output paths become the file names inside the archive")
+    parser.add('--archive-format', type=str, choices=Archive.FORMATS, help='format of the archive, by default it is taken from the file name (zip if unknown)')
+    parser.add('--fast-fields', action='store_true', help='only store the values of the fields and let the PDF viewer draw them (NeedAppearances): faster and smaller files, but viewers which ignore NeedAppearances (e.g. many previews, browsers and printers) show empty fields')
+    parser.add('-i', '--incremental', action='store_true', help='keep existing output files which were created from the same inputs, only create the changed or missing timesheets')
+    parser.add('--seed', type=int, help='seed for the random working times. Every row gets its own seed derived from it (unless it has a seed column), so the same manifest always creates the same timesheets')
+    parser.add('--jobs', type=int, default=1, metavar='N', help='number of processes which render the timesheets in parallel, 0 uses all CPU cores')
+    parser.add('--template', type=str, metavar='PATH', help='use a local PDF file as form template instead of the form from the PSE homepage')
+    parser.add('--offline', action='store_true', help='never download the form template, only use the cached copy')
+    parser.add('--cache-ttl', type=float, default=config.TEMPLATE_CACHE_TTL, metavar='SECONDS', help='how long the cached form template is used before the server is asked for a newer version')
+    parser.add('-v', '--verbose', action='store_true', help='more detailed information printing for debugging purpose')
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.archive is not None and args.output_dir is not None:
+        parser.error("--output-dir cannot be combined with --archive")
+    if args.archive is not None and args.incremental:
+        parser.error("--incremental cannot be combined with --archive, an archive is always written completely")
+
+    # an archive on stdout must not be mixed with the report
+    report = sys.stderr if args.archive == "-" else sys.stdout
+    with profiling.profile(args.profile, args.profile_json, args.profile_stats, report=report, command="timeforge batch") as profiler:
+        failed = run(args, report, profiler)
+    if failed:
+        sys.exit(1)
+
+
+def run(args, report, profiler: profiling.Profiler | None = None) -> int:
+    """
+    Create the timesheets as described by the command line arguments of `timeforge batch`
+
+    Returns
+    -------
+    failed : int
+        The number of rows which could not be created
+    """
+    rows = read_manifest(args.manifest)
+    if args.seed is not None:
+        # the seeds are set before the rows are distributed, so the timesheets do not depend on the process which creates them
+        rows = [row if row.get("seed") not in (None, "") else {**row, "seed": derive_seed(args.seed, row)} for row in rows]
+    options = {"fast_fields": args.fast_fields}
+    content = core.LoadTemplate(args.template, args.offline, args.cache_ttl)
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    archive = Archive(args.archive, args.archive_format) if args.archive is not None else None
+
+    if jobs == 1 or len(rows) < 2:
+        # the profiler of this process is already active
+        _init_worker(content, args.output_dir, archive is not None, args.incremental, options=options)
+        outcomes = map(_render_task, rows)
+        executor = None
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        jobs = min(jobs, len(rows))
+        executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(bytes(content), args.output_dir, archive is not None, args.incremental, profiler is not None, options))
+        # a memory mapped template cannot be sent to other processes, they get a copy of its content instead.
+        # the results are returned in the order of the manifest, no matter which process finishes first
+        outcomes = _imap(executor, _render_task, rows, 2 * jobs)
+
+    # a broken row should not abort the whole batch: collect the errors and report them at the end
+    results = dict()
+    failed = 0
+    unchanged = 0
+    tagged = len(profiler.records) if profiler is not None else 0
+    try:
+        for number, (success, result, records) in enumerate(outcomes, start=1):
+            if profiler is not None:
+                # the measurements of the worker process or of this process since the last row belong to this row
+                profiler.records.extend(records)
+                for record in profiler.records[tagged:]:
+                    record.setdefault("row", number)
+                tagged = len(profiler.records)
+            if success and archive is not None:
+                name, document = result
+                try:
+                    archive.add(name, document)
+                    result = name
+                except ValueError as e:
+                    success, result = False, str(e)
+            elif success:
+                result, created = result
+                if not created:
+                    unchanged += 1
+                    result = f"{result} (unchanged)"
+            if success:
+                results[f"Row {number}"] = result
+            else:
+                failed += 1
+                results[f"Row {number}"] = f"Error: {result}"
+                print(f"Row {number}: {result}", file=sys.stderr)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if archive is not None:
+            archive.close()
+
+    with contextlib.redirect_stdout(report):
+        if args.verbose:
+            core.PrintDictAsTable(results, "Manifest", "Result")
+        print(f"{len(rows) - failed - unchanged} of {len(rows)} timesheets created" + (f", {unchanged} unchanged" if args.incremental else ""))
+    return failed
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Generate the working days of many months at once with NumPy.
+
+This is an alternative to helpers.Month_Dataset.generate_content() for runs over many months and persons. Instead of
+one Python loop per time block, the random numbers for all months are drawn as arrays and only one loop over the days
+of a month remains, which works on all months at the same time. The rules are the same: time blocks between
+min_timeblock and max_timeblock hours (the last one is shortened to match the working time), at most two blocks per
+day with a pause of min_pause to max_pause hours in between, workdays only, no day twice.
+
+NumPy is an optional dependency: pip install timeforge[numpy]
+"""
+
+from datetime import date
+from . import helpers
+from . import holidays
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+def generate_months(months: list[tuple], rng=None) -> list[helpers.Month_Dataset]:
+    """
+    Generate the working days for many months
+
+    Parameters
+    ----------
+    months : list[tuple]
+        One tuple (year, month, total_work_hours, job) per month
+    rng : numpy.random.Generator | int, optional
+        The random number generator or a seed for a new one. The same seed always creates the same months
+
+    Raises
+    ------
+    RuntimeError :
+        If NumPy is not installed
+    ValueError :
+        If the working time of a month is not a finite, non-negative number or does not fit into its workdays
+
+    Returns
+    -------
+    datasets : list[helpers.Month_Dataset]
+        One dataset per month, in the same order as `months`
+    """
+    if numpy is None:
+        raise RuntimeError("The bulk generator needs NumPy, install it with: pip install timeforge[numpy]")
+    rng = numpy.random.default_rng(rng)    # returns a given generator unchanged
+
+    # the datasets are created without content, they provide the parameters for the working times
+    datasets = [helpers.Month_Dataset(year, month, hours, job, holidays.get(year), generate=False) for year, month, hours, job in months]
+    if len(datasets) == 0:
+        return datasets
+    first = datasets[0]
+    n = len(datasets)
+    hours = numpy.array([float(d.total_work_hours) for d in datasets])
+
+    # workdays: a matrix with one row per month and one column per day of the month
+    day_numbers = numpy.arange(1, 32)
+    first_weekday = numpy.array([date(d.year, d.month, 1).weekday() for d in datasets])
+    days_in_month = numpy.array([d.days_of_month(d.month, d.year) for d in datasets])
+    workday = (day_numbers[None, :] <= days_in_month[:, None]) & ((first_weekday[:, None] + day_numbers[None, :] - 1) % 7 <= 4)
+    for i, d in enumerate(datasets):
+        for holiday in d.feiertage:
+            if holiday.year == d.year and holiday.month == d.month:
+                workday[i, holiday.day - 1] = False
+    number_of_workdays = workday.sum(axis=1)
+
+    # check the working times before any time block is drawn, every workday takes at most two blocks
+    invalid = numpy.nonzero(~numpy.isfinite(hours) | (hours < 0) | (hours > 2 * first.max_timeblock * number_of_workdays))[0]
+    if len(invalid) > 0:
+        datasets[invalid[0]].check_work_hours(int(number_of_workdays[invalid[0]]))
+
+    # time blocks: draw enough blocks for the longest month (but not more than fit into its workdays) and go through
+    # them for all months at once. A block is lengthened if the remaining blocks could not take the rest of the working
+    # time, the last block is shortened so the sum matches the working time exactly
+    max_blocks = int(min(numpy.ceil(hours.max() / first.min_timeblock) + 1, 2 * number_of_workdays.max()))
+    blocks = rng.integers(first.min_timeblock, first.max_timeblock, size=(n, max_blocks), endpoint=True).astype(float)
+    hours_left = hours.copy()
+    for i in range(max_blocks):
+        required = hours_left - first.max_timeblock * (2 * number_of_workdays - i - 1)
+        blocks[:, i] = numpy.minimum(numpy.maximum(blocks[:, i], required), hours_left)
+        hours_left -= blocks[:, i]
+    number_of_blocks = (blocks > 0).sum(axis=1)
+
+    # distribute the blocks to the days, one day after another but for all months at once.
+    # two blocks are combined with a probability of p_2blocks, or if the remaining blocks would not fit otherwise
+    p_2blocks = numpy.where(hours < 20, 0.3, 1)
+    max_days = int(number_of_workdays.max())
+    work = numpy.zeros((n, max_days))
+    pause = numpy.zeros((n, max_days), dtype=int)
+    start = rng.integers(first.min_start_time, first.max_start_time, size=(n, max_days), endpoint=True)
+    position = numpy.zeros(n, dtype=int)
+    number_of_days = numpy.zeros(n, dtype=int)
+    blocks_left = number_of_blocks.copy()
+    all_months = numpy.arange(n)
+    for day in range(max_days):
+        active = blocks_left > 0
+        work[active, day] = blocks[all_months[active], position[active]]
+        position += active
+        number_of_days += active
+        blocks_left -= active
+        days_left = number_of_workdays - day - 1
+        second = active & (blocks_left > 0) & ((rng.uniform(0, 1, n) <= p_2blocks) | (blocks_left > 2 * days_left))
+        work[second, day] += blocks[all_months[second], position[second]]
+        pause[second, day] = rng.integers(first.min_pause, first.max_pause, size=second.sum(), endpoint=True)
+        position += second
+        blocks_left -= second
+
+    # dates: random keys for all workdays, sorting them gives a random selection without replacement
+    keys = numpy.where(workday, rng.random((n, 31)), numpy.inf)
+    chosen = numpy.argsort(keys, axis=1)[:, :max_days] + 1
+
+    # converting the arrays to lists at once is much faster than reading single NumPy values
+    for d, (year, month, total, job), n_days, chosen_days, starts, works, pauses in zip(
+        datasets, months, number_of_days.tolist(), chosen.tolist(), start.tolist(), work.tolist(), pause.tolist()
+    ):
+        dates = helpers.dates_of_month(year, month)
+        for day in range(n_days):
+            d.add_work(job, dates[chosen_days[day] - 1], starts[day], starts[day] + works[day] + pauses[day], pauses[day], works[day])
+    return datasets
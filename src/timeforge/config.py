@@ -5,6 +5,9 @@ from typing import Final
 # MILOG_FORM_URL: Final = r"https://www.pse.kit.edu/downloads/Formulare/KIT%20Arbeitszeitdokumentation%20MiLoG.pdf"  # old link
 MILOG_FORM_URL: Final = r"https://www.pse.kit.edu/downloads/Formulare/PSE_Abrechnung_Arbeitszeitdokumentation_2020-04-01.pdf"
 FEDERAL_STATE: Final = "BW" # short notation for Baden-Württemberg
+TEMPLATE_CACHE_TTL: Final = 7 * 24 * 60 * 60  # seconds for which the cached form is used without asking the server for a newer version
+APPEARANCE_CACHE_SIZE: Final = 4096  # number of appearance streams of text fields (look and value) which a process keeps in memory
+SERVE_TIMEOUT: Final = 30  # seconds a timesheet of `timeforge serve` may take before the worker processes are restarted
 
 # define the working time between 08:00 and 20:00
 START_WORKING: 8
@@ -3,15 +3,26 @@
 
 from contextlib import contextmanager
 from datetime import datetime, date, timedelta
-import feiertage
+import hashlib
+import io
 import itertools
+import json
+import math
+import mmap
 import os
-from pypdf import PdfReader, PdfWriter
-import requests
+import random
 import sys
-import tempfile
-from typing import Any
+from typing import Any, BinaryIO, TYPE_CHECKING
 from . import config
+from . import helpers
+from . import holidays
+from . import profiling
+from . import template
+
+# pypdf is only imported when a pdf file is created, loading it takes longer than everything else the command line needs
+if TYPE_CHECKING:
+    from pypdf import PdfWriter
+    from pypdf.generic import DictionaryObject
 
 
 def PrintDictAsTable(dataset: dict, title_keys: str, title_values: str):
@@ -68,88 +79,177 @@ def PrintListAsTable(dataset: list, title: str):
     print("└─" + "─" * max_len + "─┘")
 
 
+# from here one some functions are defined which will be needed for validating the input arguments.
+# They are created once for the schema of APP_Data and shared by all instances
+
+# this returns a function which does the type checking of the input parameters
+def _try_convert(target_type, error_msg):
+    def convert(value):
+        try:
+            value = target_type(value)
+        except (ValueError, TypeError):
+            raise ValueError(error_msg)
+        return value
+    return convert
+
+
+# the month needs an additional range checking
+def _check_month(month):
+    try:
+        month = int(month)
+    except (ValueError, TypeError):
+        month = None
+    if month is None or not 1 <= month <= 12:    # month is integer 1 to 12
+        raise ValueError("Month must be an integer between 1 and 12")
+    return month
+
+
+# the working time needs an additional range checking, "nan" and "inf" are accepted by float() but cannot be scheduled
+def _check_time(time):
+    try:
+        time = float(time)
+    except (ValueError, TypeError):
+        raise ValueError("Working time must be a number with the dot '.' as decimal separator")
+    if not math.isfinite(time) or time < 0:
+        raise ValueError("Working time must be a finite, non-negative number")
+    return time
+
+
+# the jobs also need a special validation
+def _check_jobs(jobs):
+    if (not isinstance(jobs, list)) or (len(jobs) < 1):
+        raise ValueError("Jobs argument must be of type list with minimum length of 1")
+    return jobs
+
+
+_check_seed_value = _try_convert(int, "Seed must be an integer")
+
+
+# the seed is optional, empty values mean no seed
+def _check_seed(seed):
+    if seed is None or seed == "":
+        return None
+    return _check_seed_value(seed)
+
+
 class APP_Data:
+    """
+    The personal data and the working time of a timesheet, validated when it is set.
 
-    def __init__(self):
-        # this is all the data that goes into the form in the pdf.
-        # the dictionary provides a translation from the internal keywords to the names of the pdf fields
-        self.translation_table = {
-            "name": 'GF',
-            "month": 'abc',
-            "year": 'abdd',
-            "time": ['Std', 'Summe', 'monatliche SollArbeitszeit'],
-            "personell": 'Personalnummer',
-            "salary": 'Stundensatz',
-            "organisation": 'OE',
-            "signature_pse": 'undefined',
-            "signature": 'Ich bestätige die Richtigkeit der Angaben',
-            "holiday": 'Urlaub anteilig',
-            "from_last_month": 'Übertrag vom Vormonat',
-            "for_next_month": 'Übertrag in den Folgemonat',
-        }
-        # TODO: the GF and UB fields (both default False) are currently no usable, maybe the newest version of pypdf can check boxes
+    The schema of the dataset (the names of the pdf fields, the default values and the validation functions of the
+    keys) is defined once for the class. Only the dataset itself belongs to an instance.
+    """
 
+    # this is all the data that goes into the form in the pdf.
+    # the dictionary provides a translation from the internal keywords to the names of the pdf fields
+    translation_table = {
+        "name": 'GF',
+        "month": 'abc',
+        "year": 'abdd',
+        "time": ['Std', 'Summe', 'monatliche SollArbeitszeit'],
+        "personell": 'Personalnummer',
+        "salary": 'Stundensatz',
+        "organisation": 'OE',
+        "signature_pse": 'undefined',
+        "signature": 'Ich bestätige die Richtigkeit der Angaben',
+        "holiday": 'Urlaub anteilig',
+        "from_last_month": 'Übertrag vom Vormonat',
+        "for_next_month": 'Übertrag in den Folgemonat',
+    }
+    # TODO: the GF and UB fields (both default False) are currently no usable, maybe the newest version of pypdf can check boxes
+
+    # the predefined default values of the dataset, the month and the year are taken from the system clock when an
+    # instance is created
+    defaults = {
+        "verbose": False,       # default value: False, the user only wants a verbose output for debugging
+        "signature_pse": '',    # Datum, Unterschrift Dienstvorgesetzte/r, always empty
+        "holiday": 0,           # holidays are currently not supported by this application
+        "from_last_month": 0,   # transferring holidays from the last month is currently not supported by this application
+        "for_next_month": 0,   # transferring holidays to the next month is currently not supported by this application
+        "seed": None,           # default value: None, the working times are different every time
+    }
+
+    # this is a dictionary which contains the validation functions for each keyword which has to be validated
+    validation = {
+        "name": _try_convert(str, "Name "),
+        "year": _try_convert(int, "Year must be an integer"),
+        "month": _check_month,   # month also needs a range check, therefore there is a special validation function for the month
+        "time": _check_time,    # the working time also needs a range check
+        "personell": _try_convert(int, "Personell Number must be an integer"),
+        "salary": _try_convert(float, "Salary time must be a number with the dot '.' as decimal separator"),
+        "organisation": _try_convert(str, "Organisation name  must be a string or convertible to a string"),
+        "verbose": _try_convert(bool, "Verbose must be a boolean (True / False)"),
+        "jobs": _check_jobs,  # jobs must be checked separately because they have to be of the type list with minimal length of 1
+        "seed": _check_seed,  # the seed of the random number generator for the working times, see helpers.Month_Dataset
+    }
+
+    # there are some keys which have no validation, no default value and will not be present in the pdf file. These are listed here:
+    misc_keys = frozenset({
+        "output",   # output file
+    })
+
+    # this is the set of all the available keywords which the dataset should be able to hold
+    # the 'signature' key is the one which will be automatically generated by the pdf_content() function
+    keys = frozenset(({*translation_table} - {"signature"}) | {*defaults, "month", "year"} | {*validation} | misc_keys)
+
+    # the keys which have to be set before the content of the pdf can be created
+    pdf_keys = keys - misc_keys
+
+    def __init__(self):
         # this dataset contains the data which the application needs to run.
         # some of it will be used within the pdf form and some might be used at other locations.
         # the dataset is filled with some predefined default values.
-        self.dataset = {
-            "verbose": False,       # default value: False, the user only wants a verbose output for debugging
-            "signature_pse": '',    # Datum, Unterschrift Dienstvorgesetzte/r, always empty
-            "holiday": 0,           # holidays are currently not supported by this application
-            "from_last_month": 0,   # transferring holidays from the last month is currently not supported by this application
-            "for_next_month": 0,   # transferring holidays to the next month is currently not supported by this application
-            "month": datetime.now().month,  # default month will be taken from the system clock
-            "year": datetime.now().year,    # default year will be taken from the system clock
-        }
-
-        # from here one some functions are defined which will be needed for validating the input arguments
-
-        # this returns a function which does the type checking of the input parameters
-        def try_convert(target_type, error_msg):
-            def convert(value):
-                try:
-                    value = target_type(value)
-                except (ValueError, TypeError):
-                    raise ValueError(error_msg)
-                return value
-            return convert
-
-        # the month needs an additional range checking
-        def check_month(month):
-            try:
-                month = try_convert(int, "")(month)
-                assert month in list(range(1, 13))    # month is integer 1 to 12
-            except (ValueError, AssertionError):
-                raise ValueError("Month must be an integer between 1 and 12")
-            return month
-
-        # the jobs also need a special validation
-        def check_jobs(jobs):
-            if (not isinstance(jobs, list)) or (len(jobs) < 1):
-                raise ValueError("Jobs argument must be of type list with minimum length of 1")
-            return jobs
-
-        # this is a dictionary which contains the validation functions for each keyword which has to be validated
-        self.validation = {
-            "name": try_convert(str, "Name "),
-            "year": try_convert(int, "Year must be an integer"),
-            "month": check_month,   # month also needs a range check, therefore there is a special validation function for the month
-            "time": try_convert(float, "Working time must be a number with the dot '.' as decimal separator"),
-            "personell": try_convert(int, "Personell Number must be an integer"),
-            "salary": try_convert(float, "Salary time must be a number with the dot '.' as decimal separator"),
-            "organisation": try_convert(str, "Organisation name  must be a string or convertible to a string"),
-            "verbose": try_convert(bool, "Verbose must be a boolean (True / False)"),
-            "jobs": check_jobs,  # jobs must be checked separately because they have to be of the type list with minimal length of 1
-        }
-
-        # there are some keys which have no validation, no default value and will not be present in the pdf file. These are listed here:
-        self.misc_keys = {
-            "output",   # output file
-        }
-
-        # this is the set of all the available keywords which the dataset should be able to hold
-        # the 'signature' key is the one which will be automatically generated by the pdf_content() function
-        self.keys = ({*self.translation_table} - {"signature"}) | {*self.dataset} | {*self.validation} | self.misc_keys
+        now = datetime.now()
+        self.dataset = {**self.defaults, "month": now.month, "year": now.year}
+
+    @classmethod
+    def from_mapping(cls, mapping: dict) -> "APP_Data":
+        """
+        Create a dataset from a whole record at once, see update()
+
+        Parameters
+        ----------
+        mapping : dict
+            The keys and values of the dataset
+
+        Raises
+        ------
+        KeyError :
+            In case a key is not in the list of valid keys
+        ValueError :
+            In case a value is not valid
+
+        Returns
+        -------
+        user_input : APP_Data
+            The dataset, it may still miss some keys (see missing_keys())
+        """
+        user_input = cls()
+        user_input.update(mapping)
+        return user_input
+
+    def update(self, mapping: dict):
+        """
+        Set many values in the dataset in one pass
+
+        All the values are validated before the dataset is changed, so an invalid record leaves the dataset untouched
+
+        Parameters
+        ----------
+        mapping : dict
+            The keys and values which should be set
+
+        Raises
+        ------
+        KeyError :
+            In case a key is not in the list of valid keys
+        ValueError :
+            In case a value is not valid
+        """
+        if unknown := mapping.keys() - self.keys:
+            raise KeyError(f"Keys are not in the list of valid keys: {sorted(unknown)}")
+        validation = self.validation
+        self.dataset.update({key: validation[key](value) if key in validation else value for key, value in mapping.items()})
 
     def set(self, key: str, value: Any):
         """
@@ -170,7 +270,7 @@ class APP_Data:
         """
         if key in self.keys:
             # if the key is on the list of keys which should be validated: perform a validation
-            if key in {*self.validation}:
+            if key in self.validation:
                 value = self.validation[key](value)
             # add the value to the dataset
             self.dataset[key] = value
@@ -198,7 +298,7 @@ class APP_Data:
             If the key parameter was not present in the dataset, a KeyError exception will be thrown
 
         """
-        if key in {*self.dataset}:
+        if key in self.dataset:
             return self.dataset[key]
         else:
             # the key is not in the dataset, raise an exception
@@ -215,7 +315,7 @@ class APP_Data:
         """
         # check the difference between all available keywords and the ones which are present in the dataset.
         # If there is a difference: the dataset is not complete
-        return self.keys - {*self.dataset}
+        return set(self.keys - self.dataset.keys())
 
     def pdf_content(self):
         """
@@ -230,11 +330,12 @@ class APP_Data:
         RuntimeError :
             if there are some missing keys (which can be checked with the missing_keys() methode) then a RuntimeError will be thrown
         """
-        if len(self.missing_keys()) != 0:
+        # the misc keys are not part of the pdf, e.g. a document rendered in memory does not need an output file
+        if not self.pdf_keys <= self.dataset.keys():
             raise RuntimeError("Error: one or more keys are missing in the dataset")
         # create another dict which contains only the keys of the translation_table but with the translated key table
         pdf_dict = dict()
-        for i in {*self.translation_table}:
+        for i in self.translation_table:    # in a fixed order, so the same dataset always creates the same document
             pdf_key = self.translation_table[i]
             if isinstance(pdf_key, list):
                 # if the translation table contains a list: use all keys in the list
@@ -251,36 +352,492 @@ class APP_Data:
         return pdf_dict
 
 
+def TableContent(days: list, rows: int | None = None) -> dict:
+    """
+    Translate the working days of a month into the content of the table in the pdf form
+
+    Parameters
+    ----------
+    days : list
+        The list of helpers.Day objects, e.g. from helpers.Month_Dataset.days
+    rows : int, optional
+        The number of rows in the table of the form (see template.FormTemplate.rows). The days which do not fit into the
+        table are continued on copies of the table page (see AddTablePages()). Without it all days go into one table
+
+    Returns
+    -------
+    table : dict
+        The names of the pdf fields in the table and their content, sorted by date
+    """
+    table = dict()
+    for index, day in enumerate(sorted(days)):
+        copy, table_row = divmod(index, rows) if rows else (0, index)
+        job, date, start_time, end_time, pause, work_hours = template.FormTemplate.row_fields(table_row + 1, copy + 1)
+        table[job] = day.job
+        table[date] = day.date.strftime("%d.%m.%y")
+        table[start_time] = helpers.hhmm(day.start_minutes)
+        table[end_time] = helpers.hhmm(day.end_minutes)
+        table[pause] = helpers.hhmm(day.pause_minutes)
+        table[work_hours] = helpers.hhmm(day.work_minutes)
+    return table
+
+
+def LoadTemplate(template_path: str | None = None, offline: bool = False, cache_ttl: float = config.TEMPLATE_CACHE_TTL) -> bytes | mmap.mmap:
+    """
+    Load the pdf form (see template.load()) and terminate the application if this is not possible
+
+    Parameters
+    ----------
+    template_path : str, optional
+        A local PDF file which should be used instead of the online form
+    offline : bool
+        Only use the cached form and never connect to the internet
+    cache_ttl : float
+        The time in seconds for which the cached form is used without asking the server for a newer version
+
+    Returns
+    -------
+    content : bytes | mmap.mmap
+        The content of the pdf form, see template.load()
+    """
+    try:
+        with profiling.stage("template load"):
+            return template.load(path=template_path, offline=offline, ttl=cache_ttl)
+    except Exception as e:
+        print(f"{e}\n")
+        sys.exit(os.EX_UNAVAILABLE)
+
+
+def ReadTemplate(template_path: str | None = None, offline: bool = False, cache_ttl: float = config.TEMPLATE_CACHE_TTL) -> template.FormTemplate:
+    """
+    Load the pdf form (see LoadTemplate()) and parse it.
+    The returned template can be used for any number of output files.
+
+    Parameters
+    ----------
+    template_path : str, optional
+        A local PDF file which should be used instead of the online form
+    offline : bool
+        Only use the cached form and never connect to the internet
+    cache_ttl : float
+        The time in seconds for which the cached form is used without asking the server for a newer version
+
+    Returns
+    -------
+    form_template : template.FormTemplate
+        The parsed pdf form
+    """
+    content = LoadTemplate(template_path, offline, cache_ttl)
+    with profiling.stage("template parse"):
+        return template.parse(content)
+
+
+def AddTablePages(pdf_writer: "PdfWriter", form_template: template.FormTemplate, copies: int) -> dict:
+    """
+    Append copies of the page with the table to the document, for the working days which do not fit into the table.
+    The copies share the content and the resources of the page, only the page itself, its annotations and the form
+    fields are new objects. The fields on the copies are renamed, see template.FormTemplate.continuation_name()
+
+    Parameters
+    ----------
+    pdf_writer : PdfWriter
+        The pdf document with the form, as provided by ProvideOutputFile()
+    form_template : template.FormTemplate
+        The template from which the document was created
+    copies : int
+        The number of pages which are appended
+
+    Raises
+    ------
+    ValueError :
+        If the form has no table
+
+    Returns
+    -------
+    fields : dict
+        The index of the text fields on the new pages, in the same format as template.FormTemplate.fields
+    """
+    from pypdf import PageObject
+    from pypdf.generic import ArrayObject, DictionaryObject, NameObject, TextStringObject
+
+    if form_template.table_page is None:
+        raise ValueError("The form has no table for the working days")
+    original = pdf_writer.pages[form_template.table_page]
+    acroform_fields = pdf_writer.root_object["/AcroForm"]["/Fields"]
+
+    fields = dict()
+    for copy in range(2, copies + 2):
+        # a new page dictionary which refers to the same content streams and resources
+        page = PageObject()
+        page.update({key: value for key, value in original.items() if key not in ("/Annots", "/Parent", "/StructParents")})
+        page = pdf_writer.add_page(page)
+        page_number = len(pdf_writer.pages) - 1
+
+        annotations = ArrayObject()
+        renamed = dict()    # the copies of fields with several widgets, by the object number of the original field
+        for position, reference in enumerate(original.get("/Annots", [])):
+            annotation = reference.get_object()
+            # a shallow copy: everything below the annotation (e.g. the appearance streams) is shared with the original
+            widget = DictionaryObject(annotation)
+            widget[NameObject("/P")] = page.indirect_reference
+            widget_reference = pdf_writer._add_object(widget)
+            annotations.append(widget_reference)
+            if annotation.get("/Subtype") != "/Widget":
+                continue
+            field = template.field_of_widget(annotation)
+            if "/T" not in field:
+                continue
+
+            name = form_template.continuation_name(str(field["/T"]), copy)
+            if field is annotation:
+                # the widget is the field itself
+                new_field, new_reference = widget, widget_reference
+            elif field.indirect_reference.idnum not in renamed:
+                # the first widget of a field with several widgets, the field is copied as well
+                new_field = DictionaryObject(field)
+                new_field[NameObject("/Kids")] = ArrayObject()
+                new_reference = pdf_writer._add_object(new_field)
+                renamed[field.indirect_reference.idnum] = new_reference
+            else:
+                new_field, new_reference = None, renamed[field.indirect_reference.idnum]
+
+            if new_field is not None:
+                new_field[NameObject("/T")] = TextStringObject(name)
+                # the new field belongs to the same parent as the original one, or to the top level of the form
+                if "/Parent" in new_field:
+                    new_field["/Parent"].get_object()["/Kids"].append(new_reference)
+                else:
+                    acroform_fields.append(new_reference)
+            if field is not annotation:
+                widget[NameObject("/Parent")] = new_reference
+                new_reference.get_object()["/Kids"].append(widget_reference)
+            fields.setdefault(name, {"type": str(field.get("/FT", "")), "widgets": []})["widgets"].append({
+                "page": page_number,
+                "annotation": position,
+                "rect": [float(i) for i in annotation.get("/Rect", [])],
+            })
+        page[NameObject("/Annots")] = annotations
+    return fields
+
+
+# the content of the appearance streams of text fields by the look of the widget and the value, shared by all the
+# documents of a process, see FillForm()
+_appearances: dict = {}
+
+
+def _appearance_style(pdf_writer: "PdfWriter", form_template: template.FormTemplate, annotation: "DictionaryObject", field: "DictionaryObject") -> tuple:
+    # everything besides the value which pypdf uses to create the appearance stream of a text field
+    acroform = pdf_writer.root_object["/AcroForm"]
+    rect = [float(i) for i in annotation["/Rect"]]
+    da = str(annotation.get_inherited("/DA", acroform.get("/DA", "")))
+    tokens = da.split()
+    font = tokens[tokens.index("Tf") - 2] if "Tf" in tokens[2:] else None
+    resources = annotation.get_inherited("/DR", acroform.get("/DR"))
+    fonts = resources.get_object().get("/Font") if resources is not None else None
+    font_resource = fonts.get_object().raw_get(font) if fonts is not None and font in fonts else None
+    existing = annotation["/AP"].get_object().get("/N") if "/AP" in annotation else None
+    return (
+        form_template.sha256,
+        abs(rect[2] - rect[0]), abs(rect[3] - rect[1]),
+        da, int(field.get("/Ff", 0)), str(field.get("/FT", "/Tx")),
+        getattr(font_resource, "idnum", repr(font_resource)),
+        # pypdf keeps these entries of an existing appearance stream
+        tuple((key, repr(value)) for key, value in existing.get_object().items() if key not in ("/BBox", "/Length", "/Subtype", "/Type", "/Filter", "/Resources"))
+        if existing is not None else (),
+    )
+
+
+def FillForm(pdf_writer: "PdfWriter", form_template: template.FormTemplate, form_data: dict, fields: dict | None = None, fast_fields: bool = False):
+    """
+    Fill out the fields of the form
+
+    Widgets with the same look (size, font, flags) and the same value share one appearance stream in the document, and
+    the content of the appearance streams is cached for the following documents of the process. A cached appearance
+    stream creates exactly the same document as a new one
+
+    Parameters
+    ----------
+    pdf_writer : PdfWriter
+        The pdf document with the form, as provided by ProvideOutputFile()
+    form_template : template.FormTemplate
+        The template from which the document was created, as provided by ProvideOutputFile()
+    form_data : dict
+        The names of the pdf fields and their content. Names which are not text fields of the form are ignored
+    fields : dict, optional
+        The index of additional fields in the document, see AddTablePages()
+    fast_fields : bool
+        Only set the values of the fields and leave the appearance to the pdf viewer (/NeedAppearances). The appearance
+        streams of the widgets are removed, so no viewer shows the empty fields of the form instead
+    """
+    from pypdf.generic import ArrayObject, DecodedStreamObject, DictionaryObject, NameObject, TextStringObject
+
+    # update_page_form_field_values() compares every annotation of a page with every given field, so calling it for
+    # the whole page would be quadratic in the number of fields. Instead it only gets one widget at a time, which is
+    # looked up in the index of the template
+    pdf_writer.set_need_appearances_writer(True)
+    streams = dict()        # the appearance streams of this document by the look of the widget and the value
+    prototypes = dict()     # the entries of the first appearance stream of every look in this document
+    for name, value in form_data.items():
+        if name in form_template:
+            widgets = form_template.fields[name]["widgets"]
+        elif fields is not None and name in fields and fields[name]["type"] == "/Tx":
+            widgets = fields[name]["widgets"]
+        else:
+            continue
+        for widget in widgets:
+            reference = pdf_writer.pages[widget["page"]]["/Annots"][widget["annotation"]]
+            annotation = reference.get_object()
+            field = template.field_of_widget(annotation)
+            if fast_fields:
+                field[NameObject("/V")] = TextStringObject(value)
+                annotation.pop("/AP", None)
+                continue
+            style = _appearance_style(pdf_writer, form_template, annotation, field)
+            key = (style, value)
+
+            if key not in streams and style in prototypes and key in _appearances:
+                # the same stream pypdf would create, built from the content of an earlier document
+                stream = DecodedStreamObject()
+                stream.update(prototypes[style])
+                stream.set_data(_appearances[key])
+                streams[key] = pdf_writer._add_object(stream)
+            if key in streams:
+                field[NameObject("/V")] = TextStringObject(value)
+                appearance = DictionaryObject(annotation["/AP"].get_object()) if "/AP" in annotation else DictionaryObject()
+                appearance[NameObject("/N")] = streams[key]
+                annotation[NameObject("/AP")] = appearance
+                continue
+
+            if "/AP" in annotation and "/N" in annotation["/AP"]:
+                # pypdf replaces an existing appearance stream in place. It may be shared with the copy of the widget on
+                # a continuation page (see AddTablePages()), so the widget gets its own placeholder first
+                appearance = DictionaryObject(annotation["/AP"].get_object())
+                appearance[NameObject("/N")] = pdf_writer._add_object(DictionaryObject(appearance["/N"].get_object()))
+                annotation[NameObject("/AP")] = appearance
+            pdf_writer.update_page_form_field_values(DictionaryObject({NameObject("/Annots"): ArrayObject([reference])}), {name: value}, auto_regenerate=None)
+            streams[key] = annotation["/AP"].raw_get("/N")
+            stream = streams[key].get_object()
+            prototypes.setdefault(style, dict(stream))
+            if key not in _appearances:
+                if len(_appearances) >= config.APPEARANCE_CACHE_SIZE:
+                    del _appearances[next(iter(_appearances))]  # the oldest entry
+                _appearances[key] = stream.get_data()
+
+
 @contextmanager
-def ProvideOutputFile(output_file: str):
-    # store the online PDF in a temporary file which will automatically be deleted when this contextmanager will be left
-    with tempfile.TemporaryFile(suffix=".pdf") as temp:
+def ProvideOutputFile(output_file: "str | BinaryIO", template_path: str | None = None, offline: bool = False, cache_ttl: float = config.TEMPLATE_CACHE_TTL, form_template: template.FormTemplate | None = None):
+    # output_file is either a path or a binary file-like object (a file opened with 'wb', io.BytesIO, a socket, ...)
+    from pypdf import PdfWriter
+
+    # the form can be parsed once with ReadTemplate() and then be passed here for every output file
+    if form_template is None:
+        form_template = ReadTemplate(template_path, offline, cache_ttl)
+    with profiling.stage("document copy"):
+        pdf_writer = PdfWriter(clone_from=form_template.reader)   # to copy everything else pdf_writer= PdfWriter();pdf_writer.append(pdf_reader)
+
+    try:
+        yield pdf_writer, form_template
+    finally:
+        with profiling.stage("write"):
+            if isinstance(output_file, (str, os.PathLike)):
+                with open(output_file, 'wb') as output_file:    # write file
+                    pdf_writer.write(output_file)
+            else:
+                pdf_writer.write(output_file)   # the caller owns the stream and closes it
 
-        # download online form and store it in a temp file
-        try:
-            r: requests.Response = requests.get(config.MILOG_FORM_URL, allow_redirects=True)
-        except Exception as e:
-            print(f"Exception when downloading PSE-Hiwi Formular -> {e}\n")
-            sys.exit(os.EX_UNAVAILABLE)
 
-        temp.write(r.content)
-        temp.seek(0)    # move cursor back to the beginning of the file
+def FillTimesheet(pdf_writer: "PdfWriter", form_template: template.FormTemplate, form_data: dict, days: list, fast_fields: bool = False) -> dict:
+    """
+    Fill out the form with the personal data and the table of working days. If there are more days than rows in the
+    table, copies of the table page are appended (see AddTablePages()) and the personal data is repeated on them
 
-        pdf_reader = PdfReader(temp)
-        pdf_writer = PdfWriter(clone_from=pdf_reader)   # to copy everything else pdf_writer= PdfWriter();pdf_writer.append(pdf_reader)
+    Parameters
+    ----------
+    pdf_writer : PdfWriter
+        The pdf document with the form, as provided by ProvideOutputFile()
+    form_template : template.FormTemplate
+        The template from which the document was created, as provided by ProvideOutputFile()
+    form_data : dict
+        The names of the pdf fields and their content, without the table (see APP_Data.pdf_content())
+    days : list
+        The list of helpers.Day objects, e.g. from helpers.Month_Dataset.days
+    fast_fields : bool
+        Only set the values of the fields and leave their appearance to the pdf viewer, see FillForm()
+
+    Raises
+    ------
+    ValueError :
+        If there are working days but the form has no table
+
+    Returns
+    -------
+    form_data : dict
+        The content of all the filled out fields
+    """
+    with profiling.stage("fill"):
+        form_data = dict(form_data)
+        fields = None
+        if len(days) > form_template.rows:
+            copies = -(-len(days) // max(form_template.rows, 1)) - 1
+            fields = AddTablePages(pdf_writer, form_template, copies)
+            header = [name for name in form_template.table_page_fields() if name in form_data]
+            for copy in range(2, copies + 2):
+                form_data.update({form_template.continuation_name(name, copy): form_data[name] for name in header})
+        form_data.update(TableContent(days, form_template.rows))
+        FillForm(pdf_writer, form_template, form_data, fields, fast_fields)
+    return form_data
 
-        fields = pdf_reader.get_form_text_fields()  # get the field names from the form in the pdf
 
+# the key in the document information of a pdf file under which the checksum of its inputs is stored, see InputHash()
+INPUT_HASH_KEY = "/TimeForgeInputs"
+
+# the version of the installed package, looked up on the first call of InputHash()
+_version = None
+
+
+def InputHash(user_input: APP_Data, form_template: template.FormTemplate, **options) -> str:
+    """
+    Calculate a checksum of everything a generated timesheet depends on: the dataset (without the output file, but
+    with the seed), the form template, the holidays of the year and the version of TimeForge, which contains the rules for the working times.
+    Two timesheets with the same checksum are equivalent, so an existing one does not have to be created again
+
+    Parameters
+    ----------
+    user_input : APP_Data
+        The personal data and the working time
+    form_template : template.FormTemplate
+        The parsed pdf form
+    options :
+        The options of WriteTimesheet() which change the document, e.g. fast_fields=True
+
+    Returns
+    -------
+    checksum : str
+        The sha256 checksum as hexadecimal string
+    """
+    global _version
+    if _version is None:
+        from importlib.metadata import version, PackageNotFoundError
         try:
-            yield pdf_writer, fields
-        finally:
-            with open(output_file, 'wb') as output_file:    # write file
-                pdf_writer.write(output_file)
+            _version = version("timeforge")
+        except PackageNotFoundError:
+            _version = "unknown"
+
+    year = user_input.get("year")
+    inputs = {
+        "dataset": {key: value for key, value in user_input.dataset.items() if key not in user_input.misc_keys | {"verbose"}},
+        "template": form_template.sha256,
+        "holidays": sorted(day.isoformat() for day in holidays.get(year)),
+        "version": _version,
+    }
+    # only options which differ from the default are added, so the checksum of a default timesheet stays the same
+    if changed := {key: value for key, value in options.items() if value}:
+        inputs["options"] = changed
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def StoredInputHash(path: str) -> str | None:
+    """
+    Read the checksum of the inputs from a timesheet which was created before, see InputHash()
+
+    Parameters
+    ----------
+    path : str
+        The pdf file
+
+    Returns
+    -------
+    checksum : str | None
+        The stored checksum or None if the file does not exist, cannot be read or has no checksum
+    """
+    from pypdf import PdfReader
+
+    try:
+        metadata = PdfReader(path).metadata
+        return str(metadata[INPUT_HASH_KEY]) if metadata is not None and INPUT_HASH_KEY in metadata else None
+    except Exception:
+        return None
+
+
+def WriteTimesheet(user_input: APP_Data, output_file: "str | BinaryIO", month: helpers.Month_Dataset | None = None, form_template: template.FormTemplate | None = None, fast_fields: bool = False) -> helpers.Month_Dataset:
+    """
+    Create a complete timesheet and write it to a file or a stream
+
+    Parameters
+    ----------
+    user_input : APP_Data
+        The personal data and the working time, all the keys except 'output' have to be set (see APP_Data.missing_keys())
+    output_file : str | BinaryIO
+        A path or a binary file-like object the pdf document is written to. Streams are not closed
+    month : helpers.Month_Dataset, optional
+        The working days which are written into the table. If it is missing they will be generated from the user input
+        and the checksum of the inputs is stored in the document (see InputHash())
+    form_template : template.FormTemplate, optional
+        The parsed pdf form (see ReadTemplate()). If it is missing the form will be loaded with the default settings
+    fast_fields : bool
+        Only set the values of the fields and leave their appearance to the pdf viewer, see FillForm()
+
+    Raises
+    ------
+    RuntimeError :
+        If some keys of the user input are missing
+
+    Returns
+    -------
+    month : helpers.Month_Dataset
+        The working days in the table of the timesheet
+    """
+    with profiling.stage("validation"):
+        if len(missing := user_input.missing_keys() - user_input.misc_keys) != 0:
+            raise RuntimeError(f"Missing keys in the internal dataset, cannot generate pdf: {missing}")
+        form_data = user_input.pdf_content()
+
+    generated = month is None
+    if generated:
+        year = user_input.get("year")
+        with profiling.stage("holidays"):
+            feiertage = holidays.get(year)
+        with profiling.stage("generation"):
+            seed = user_input.get("seed")
+            rng = random.Random(seed) if seed is not None else None
+            month = helpers.Month_Dataset(year, user_input.get("month"), user_input.get("time"), user_input.get("jobs")[0], feiertage, rng=rng)
+
+    with ProvideOutputFile(output_file, form_template=form_template) as (WriteInPDF, form_template):
+        FillTimesheet(WriteInPDF, form_template, form_data, month.days, fast_fields)
+        if generated:
+            # remember the inputs, so a later run can tell whether the timesheet has to be created again
+            WriteInPDF.add_metadata({INPUT_HASH_KEY: InputHash(user_input, form_template, fast_fields=fast_fields)})
+    return month
+
+
+def RenderTimesheet(user_input: APP_Data, month: helpers.Month_Dataset | None = None, form_template: template.FormTemplate | None = None, fast_fields: bool = False) -> bytes:
+    """
+    Create a complete timesheet in memory, see WriteTimesheet()
+
+    Parameters
+    ----------
+    user_input : APP_Data
+        The personal data and the working time, all the keys except 'output' have to be set
+    month : helpers.Month_Dataset, optional
+        The working days which are written into the table. If it is missing they will be generated from the user input
+    form_template : template.FormTemplate, optional
+        The parsed pdf form (see ReadTemplate())
+    fast_fields : bool
+        Only set the values of the fields and leave their appearance to the pdf viewer, see FillForm()
+
+    Returns
+    -------
+    content : bytes
+        The content of the pdf document
+    """
+    buffer = io.BytesIO()
+    WriteTimesheet(user_input, buffer, month, form_template, fast_fields=fast_fields)
+    return buffer.getvalue()
 
 
 class MonthDataset:
 
     def __init__(self, year: date, month: date, total_work_time: float, jobs: list[str]):
-        self.feiertage = feiertage.Holidays(config.FEDERAL_STATE).get_holidays_list()
+        self.feiertage = holidays.get(year)
         # TODO
         raise NotImplementedError
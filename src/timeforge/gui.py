@@ -16,16 +16,9 @@ Roadmap
 """
 
 import curses
-from datetime import datetime, date, timedelta
-import feiertage
+from datetime import datetime
 import os
-from pypdf import PdfReader, PdfWriter
-import requests
-import sys
-import tempfile
 from . import text_input
-from . import helpers
-from . import config
 from . import core
 
 
@@ -130,8 +123,8 @@ class tui:
         self._surrounding_background = curses.color_pair(0)  # 0 is always wired to White and Black and cannot be changed
         self.stdscr.bkgd(self._surrounding_background)
 
-        # display initialised screen with background color
-        self.stdscr.refresh()
+        # display initialised screen with background color (with the first update of the screen, see text_input.read_key())
+        self.stdscr.noutrefresh()
 
     def update_size(self):
         """
@@ -200,7 +193,7 @@ class tui:
         start_title_x = (window_length + 2) // 2 - len(title) // 2
         self.border.addstr(0, start_title_x - 1, "┤" + str(title) + "├")
         # draw the currently generated border
-        self.border.refresh()
+        self.border.noutrefresh()
 
         # now start drawing the form window
         self.form = curses.newwin(window_height, window_length, start_window_y, start_window_x)
@@ -257,8 +250,9 @@ class tui:
 
         # update the drawing of the main field and after that all the text fields
         # inside (otherwise the text fields will be overdrawn)
-        self.form.refresh()
+        self.form.noutrefresh()
         for i in self.textfields:
+            i.dirty = True
             i.draw()
 
         # put the cursor into the name input field
@@ -271,8 +265,8 @@ class tui:
         """
 
         while True:
-            # wait for key press and get the key
-            key = self.current_field.input(self.stdscr.get_wch())
+            # wait for key press and get the key, the screen is updated once all waiting keys are handled
+            key = self.current_field.input(text_input.read_key(self.stdscr))
 
             # if the focus is currently on a button: deactivate it and activate it later because the focus might change
             if isinstance(self.current_field, text_input.button):
@@ -321,29 +315,10 @@ class tui:
         self.user_input.set("output", "~/out.pdf")
         if len(missing := self.user_input.missing_keys()) != 0:
             raise RuntimeError(f"Missing keys in the internal dataset, cannot generate pdf: {missing}")
-        self.form_data = self.user_input.pdf_content()
 
     def create_pdf_content(self):
-        # list of national holidays in the German state "Baden-Württemberg"
-        feiertage_list = feiertage.Holidays(config.FEDERAL_STATE).get_holidays_list()
-
-        # Generate the content for the PDF file
-        table_row = 1
-        month = helpers.Month_Dataset(self.user_input.get("year"), self.user_input.get("month"), self.user_input.get("time"), "", feiertage_list)
-        days = month.days
-        for day in sorted(days):
-            self.form_data['Tätigkeit Stichwort ProjektRow' + str(table_row)] = day.job
-            self.form_data["ttmmjjRow" + str(table_row)] = day.date.strftime("%d.%m.%y")
-            self.form_data["hhmmRow" + str(table_row)] = day.start_time.strftime("%H:%M")
-            self.form_data["hhmmRow" + str(table_row) + "_2"] = day.end_time.strftime("%H:%M")
-            self.form_data["hhmmRow" + str(table_row) + "_3"] = day.pause.strftime("%H:%M")
-            self.form_data["hhmmRow" + str(table_row) + "_4"] = day.work_hours.strftime("%H:%M")
-            table_row += 1
-
-        with core.ProvideOutputFile(str(os.path.expanduser('~')) + "/out.pdf") as (WriteInPDF, fields):
-            for field in fields:                    # fill out all the fields in the form
-                if field in self.form_data:
-                    WriteInPDF.update_page_form_field_values(WriteInPDF.pages[0], {field: self.form_data[field]})
+        # Generate the content for the PDF file and write it
+        core.WriteTimesheet(self.user_input, str(os.path.expanduser('~')) + "/out.pdf")
 
 
 def main():
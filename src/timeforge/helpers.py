@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 # -*- encoding: utf8 -*-
 
+import calendar
+import math
 import random
-import requests
 import os
 import sys
 import typing
@@ -11,27 +12,73 @@ from datetime import date, datetime, time
 
 # store all the table data in an internal data structure
 
+# Python only caches the integers up to 256, every other calculated number of minutes would be a new object. Taking
+# them from this table lets all days share the same integer objects
+_MINUTES = tuple(range(24 * 60))
+
+# date objects are immutable, so all the datasets of a month can share the same objects for the same day
+_dates_of_month: dict = {}
+
+
+def dates_of_month(year: int, month: int) -> list:
+    # all the dates of a month, created only once per process
+    if (year, month) not in _dates_of_month:
+        _dates_of_month[(year, month)] = [date(year, month, day) for day in range(1, calendar.monthrange(year, month)[1] + 1)]
+    return _dates_of_month[(year, month)]
+
+
+def hhmm(minutes: int) -> str:
+    # format an amount of minutes as in the form, e.g. 08:30
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
 # a class to store every row in the table (=every single working day) in an internal data structure
+# many of these objects are created for batches over many persons and years, so the times are stored compactly as
+# integer minutes in slots and only converted to datetime.time or a string when they are needed
 class Day:
+    __slots__ = ("job", "date", "start_minutes", "end_minutes", "work_minutes", "pause_minutes")
+
     def __init__(self, job, date, start_time, end_time, pause, work_hours):
         self.job = job                           # Job description
         self.date = date                          # the date of the day
-        self.start_time = self.time_from_h(start_time)  # working start time
-        self.end_time = self.time_from_h(end_time)    # working end time
-        self.work_hours = self.time_from_h(work_hours)  # total working hours per day
-        self.pause = self.time_from_h(pause)       # total pause hours per day
+        self.start_minutes = self.minutes_from_h(start_time)  # working start time
+        self.end_minutes = self.minutes_from_h(end_time)    # working end time
+        self.work_minutes = self.minutes_from_h(work_hours)  # total working hours per day
+        self.pause_minutes = self.minutes_from_h(pause)       # total pause hours per day
 
     def __lt__(self, other):
         return self.date < other.date
 
-    def time_from_h(self, hours):
-        return time(hour=int(hours), minute=int(hours * 60 % 60))
+    @staticmethod
+    def minutes_from_h(hours):
+        minutes = int(hours) * 60 + int(hours * 60 % 60)
+        return _MINUTES[minutes] if 0 <= minutes < len(_MINUTES) else minutes
+
+    @staticmethod
+    def time_from_minutes(minutes):
+        return time(hour=minutes // 60, minute=minutes % 60)
+
+    @property
+    def start_time(self):
+        return self.time_from_minutes(self.start_minutes)
+
+    @property
+    def end_time(self):
+        return self.time_from_minutes(self.end_minutes)
+
+    @property
+    def work_hours(self):
+        return self.time_from_minutes(self.work_minutes)
+
+    @property
+    def pause(self):
+        return self.time_from_minutes(self.pause_minutes)
 
 # a class to store the whole content of the table (=a month) internally
 
 
 class Month_Dataset:
-    def __init__(self, year, month, total_work_hours, job, feiertage):
+    def __init__(self, year, month, total_work_hours, job, feiertage, generate=True, rng: random.Random | None = None):
         # values which define the working times
         self.min_timeblock = 2     # the minimal amount of working time per day
         self.max_timeblock = 4     # the maximum of working time at once (there might be longer blocks but then they have brakes in between
@@ -42,25 +89,49 @@ class Month_Dataset:
 
         self.feiertage = feiertage
 
+        # the random number generator for the working times. An own random.Random with a seed makes them reproducible
+        # and independent of everything else which uses random numbers, the default is the global one of the random module
+        self.rng = rng if rng is not None else random
+
         self.month = month
         self.year = year
         self.total_work_hours = total_work_hours
         self.days = []
+        self.timeblocks = []
+        if not generate:
+            # the days will be filled in from outside, e.g. by the vectorized generator in the bulk module
+            return
+        # check the working time before any time block is drawn, every workday takes at most two blocks
+        workdays = self.workdays()
+        self.check_work_hours(len(workdays))
         # TODO: put this function call return value directly into the function call one line below
-        self.timeblocks = self.make_timeblocks(self.total_work_hours)
-        self.generate_content(job)  # fill the table with content
+        self.timeblocks = self.make_timeblocks(self.total_work_hours, self.rng, 2 * len(workdays))
+        self.generate_content(job, self.rng, workdays)  # fill the table with content
 
-    def make_timeblocks(self, work_hours_left):
+    def check_work_hours(self, number_of_workdays: int) -> None:
+        # the working time has to be a finite amount of hours which fits into the workdays with two blocks per day
+        if not math.isfinite(self.total_work_hours) or self.total_work_hours < 0:
+            raise ValueError(f"The working time has to be a finite, non-negative number of hours, not {self.total_work_hours}")
+        if self.total_work_hours > 2 * self.max_timeblock * number_of_workdays:
+            raise ValueError(f"{self.total_work_hours} hours of working time do not fit into the {number_of_workdays} workdays of {self.month:02d}/{self.year}")
+
+    def make_timeblocks(self, work_hours_left, rng=random, max_timeblocks=None):
         # Create an array with random time blocks which in sum fill the whole working time for a month
+        # with at most `max_timeblocks` blocks, a block is lengthened if the remaining blocks could not take the rest
         timeblock_array = []
+        # the working time which the blocks after the current one can take at most
+        capacity = self.max_timeblock * (max_timeblocks - 1) if max_timeblocks is not None else math.inf
         while work_hours_left > 0:
             # TODO: Check weather the call of the random function is done properly
-            timeblock_length = random.randint(self.min_timeblock, self.max_timeblock)
+            timeblock_length = rng.randint(self.min_timeblock, self.max_timeblock)
+            if work_hours_left - timeblock_length > capacity:
+                timeblock_length = work_hours_left - capacity
             if work_hours_left - timeblock_length < 0:
                 timeblock_length = work_hours_left
 
             timeblock_array.append(timeblock_length)
             work_hours_left -= timeblock_length
+            capacity -= self.max_timeblock
         return timeblock_array
 
     def add_work(self, job, date, start_time, end_time, pause, work_hours):
@@ -77,14 +148,15 @@ class Month_Dataset:
         number_of_days_in_month = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
         return number_of_days_in_month[month-1]
 
-    def generate_content(self, job):
+    def workdays(self) -> list:
+        # all the days of the month on which work can be done: monday to friday, but no holidays
+        # the weekday of every day follows from the weekday of the first one
+        dates = dates_of_month(self.year, self.month)
+        first_weekday = dates[0].weekday()
+        holidays = {d.day for d in self.feiertage if d.year == self.year and d.month == self.month}
+        return [d for d in dates if (first_weekday + d.day - 1) % 7 <= 4 and d.day not in holidays]
 
-        def suggest_day_of_month():
-            while True:
-                day = random.randint(1, self.days_of_month(self.month, self.year))  # random day from the 1st to the last day of the month
-                d = date(self.year, self.month, day)
-                if d.weekday() <= 4 and not d in self.feiertage:
-                    return d
+    def generate_content(self, job, rng=random, workdays=None):
 
         # brakes will be added randomly. At 20h of total working time per day two hours of work have to be done to fit everything into the table
         if self.total_work_hours < 20:
@@ -92,23 +164,27 @@ class Month_Dataset:
         else:
             p_2blocks = 1
 
-        dates = []
-
+        # the time blocks fit into the workdays with at most two blocks per day (see check_work_hours()). The list of
+        # workdays is consumed
+        workdays = self.workdays() if workdays is None else workdays
         timeblocks_left = len(self.timeblocks)
+
         while timeblocks_left > 0:
-            d = suggest_day_of_month()
-            if not d in dates:
-                dates.append(d)
+            # draw the dates without replacement: swap a random workday to the end of the list and remove it from there
+            i = rng.randrange(len(workdays))
+            workdays[i], workdays[-1] = workdays[-1], workdays[i]
+            d = workdays.pop()
+            timeblocks_left -= 1
+            work_time = self.timeblocks.pop()  # get latest entry of timeblock list
+            start_time = rng.randint(self.min_start_time, self.max_start_time)    # generate random time to start the day
+            pause = 0
+
+            # add a random break and a second working block
+            # the second block is mandatory if the remaining time blocks would not fit into the remaining days otherwise
+            if (p_2blocks >= rng.uniform(0, 1) or timeblocks_left > 2 * len(workdays)) and timeblocks_left > 0:
                 timeblocks_left -= 1
-                work_time = self.timeblocks.pop()  # get latest entry of timeblock list
-                start_time = random.randint(self.min_start_time, self.max_start_time)    # generate random time to start the day
-                pause = 0
-
-                # add a random break and a second working block
-                if p_2blocks >= random.uniform(0, 1) and timeblocks_left > 0:
-                    timeblocks_left -= 1
-                    pause = random.randint(self.min_pause, self.max_pause)
-                    work_time += self.timeblocks.pop()
-
-                end_time = start_time + work_time + pause
-                self.add_work(job, d, start_time, end_time, pause, work_time)
+                pause = rng.randint(self.min_pause, self.max_pause)
+                work_time += self.timeblocks.pop()
+
+            end_time = start_time + work_time + pause
+            self.add_work(job, d, start_time, end_time, pause, work_time)
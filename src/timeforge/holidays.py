@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+The holidays of a federal state, calculated once per year and process.
+
+All entry points (command line, TUI, batch) and the generators take the holidays from here, so a run over many
+timesheets calculates every year exactly once. A frozenset makes the check whether a day is a holiday a constant time
+operation.
+"""
+
+from datetime import date
+from . import config
+
+
+# the holidays which were already calculated, keyed by (state, year)
+_calendar: dict = {}
+
+
+def get(year: int, state: str = config.FEDERAL_STATE) -> frozenset[date]:
+    """
+    Get the holidays of a year
+
+    Parameters
+    ----------
+    year : int
+        The year
+    state : str
+        The short notation of the German federal state, e.g. "BW" for Baden-Württemberg
+
+    Returns
+    -------
+    holidays : frozenset[date]
+        The dates of all holidays in this year
+    """
+    key = (state, int(year))
+    if key not in _calendar:
+        import feiertage    # only needed on the first call for a year
+        _calendar[key] = frozenset(feiertage.Holidays(state, year=int(year)).get_holidays_list())
+    return _calendar[key]
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Measure where the time of a run goes.
+
+The stages of the pipeline (argument parsing, validation, holidays, generation of the working times, loading and parsing
+the template, filling and writing the pdf document) are marked with `with profiling.stage("name"):`. As long as no
+Profiler is active this does nothing, so the marks can stay in the code. A Profiler records the wall time and the
+peak of the memory allocated by Python (tracemalloc) of every stage:
+
+    with profiling.Profiler() as profiler:
+        core.RenderTimesheet(user_input)
+    core.PrintDictAsTable(profiler.summary(), "Stage", "Time / peak memory")
+
+The records can be written as JSON lines, so the measurements of many runs can be aggregated. Tracing the memory
+slows Python down, the times are only comparable with other profiled runs.
+"""
+
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+
+# the profiler which receives the measurements of stage(), there is at most one per process
+_active = None
+
+# stage() returns this object while no profiler is active, so an unprofiled run does not create anything
+_inactive = contextlib.nullcontext()
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "start", "current", "peak")
+
+    def __init__(self, profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._enter(self)
+        return self
+
+    def __exit__(self, *exception):
+        self.profiler._exit(self)
+
+
+def stage(name: str):
+    """
+    Mark a stage of the pipeline
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage. Stages with the same name are summed up in the summary of the profiler
+
+    Returns
+    -------
+    context : context manager
+        Measures the code inside the with block if a profiler is active
+    """
+    if _active is None:
+        return _inactive
+    return _Stage(_active, name)
+
+
+class Profiler:
+    """
+    Record the wall time and the peak memory of every stage (see stage()) while it is active.
+
+    Stages can be nested, the time and the memory of an inner stage are also part of the outer one.
+
+    Parameters
+    ----------
+    memory : bool
+        Trace the memory allocations with tracemalloc
+    """
+
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self.records = []       # one dictionary per finished stage, see record()
+        self._stack = []
+        self._tracing = False
+        self._pid = None
+
+    def __enter__(self):
+        global _active
+        # a forked worker process inherits the profiler of its parent, it is replaced by the one of the worker
+        if _active is not None and _active._pid == os.getpid():
+            raise RuntimeError("Another profiler is already active")
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._pid = os.getpid()
+        _active = self
+        return self
+
+    def __exit__(self, *exception):
+        global _active
+        _active = None
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def _enter(self, stage: _Stage):
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # the peak until now belongs to the outer stage, the peak of this stage is measured from here
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            stage.current, stage.peak = current, current
+        self._stack.append(stage)
+        stage.start = time.perf_counter()
+
+    def _exit(self, stage: _Stage):
+        seconds = time.perf_counter() - stage.start
+        self._stack.pop()
+        peak = None
+        if self.memory:
+            stage.peak = max(stage.peak, tracemalloc.get_traced_memory()[1])
+            peak = stage.peak - stage.current
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, stage.peak)
+        self.record(stage.name, seconds, peak)
+
+    def record(self, name: str, seconds: float, peak: int | None = None, **context):
+        """
+        Add a measurement which was taken outside of a stage, e.g. in another process
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage
+        seconds : float
+            The wall time of the stage
+        peak : int, optional
+            The peak of the memory allocated in the stage, in bytes
+        context :
+            Further information which is stored with the measurement, e.g. the row of a manifest
+        """
+        self.records.append({"stage": name, "seconds": seconds, "peak": peak, **context})
+
+    def take(self) -> list[dict]:
+        """
+        Remove the records and return them, e.g. to send them from a worker process to the main process
+
+        Returns
+        -------
+        records : list[dict]
+            The records since the last call
+        """
+        records, self.records = self.records, []
+        return records
+
+    def summary(self) -> dict:
+        """
+        Sum up the records of every stage, in the order in which the stages were first seen
+
+        Returns
+        -------
+        summary : dict
+            The name of every stage and a text with its number of calls, total time and highest peak memory, which can
+            be printed with core.PrintDictAsTable()
+        """
+        stages = dict()
+        for record in self.records:
+            count, seconds, peak = stages.get(record["stage"], (0, 0.0, None))
+            if record["peak"] is not None:
+                peak = max(peak or 0, record["peak"])
+            stages[record["stage"]] = (count + 1, seconds + record["seconds"], peak)
+
+        summary = dict()
+        for name, (count, seconds, peak) in stages.items():
+            text = f"{seconds * 1000:10.2f} ms"
+            if count > 1:
+                text += f" ({count}x, {seconds * 1000 / count:.2f} ms each)"
+            if peak is not None:
+                text += f", peak {peak / 1024:.0f} KiB"
+            summary[name] = text
+        return summary
+
+    def write_json_lines(self, path: str, **context):
+        """
+        Append the records to a file with one JSON object per line
+
+        Parameters
+        ----------
+        path : str
+            The file, it is created if it does not exist
+        context :
+            Further information which is added to every line, e.g. the command
+        """
+        with open(path, "a", encoding="utf-8") as f:
+            for record in self.records:
+                f.write(json.dumps({**context, **record}, default=str) + "\n")
+
+
+def add_arguments(parser):
+    """
+    Add the command line arguments for profile() to a parser
+
+    Parameters
+    ----------
+    parser : configargparse.ArgParser
+        The parser of a command
+    """
+    parser.add('--profile', action='store_true', help='print the wall time and the peak memory of every stage of the run')
+    parser.add('--profile-json', type=str, metavar='PATH', help='append the measurements of every stage as JSON lines to this file')
+    parser.add('--profile-stats', type=str, metavar='PATH', help='run under cProfile and write the statistics to this file, see `python -m pstats`')
+
+
+@contextlib.contextmanager
+def profile(table: bool = False, json_lines: str | None = None, stats: str | None = None, report=None, **context):
+    """
+    Profile the code inside the with block as requested on the command line
+
+    Parameters
+    ----------
+    table : bool
+        Print the summary of the stages as a table when the block ends
+    json_lines : str, optional
+        Append the records to this file, see Profiler.write_json_lines()
+    stats : str, optional
+        Run the block under cProfile and write its statistics to this file, they can be read with the pstats module
+    report : TextIO, optional
+        The stream for the table, stdout by default
+    context :
+        Further information which is added to every JSON line
+
+    Returns
+    -------
+    profiler : Profiler | None
+        The active profiler or None if nothing was requested
+    """
+    if not (table or json_lines or stats):
+        yield None
+        return
+
+    # the stages are only recorded if they are needed, cProfile alone should not be distorted by tracemalloc
+    profiler = Profiler() if table or json_lines else None
+    cprofile = None
+    if stats:
+        import cProfile
+        cprofile = cProfile.Profile()
+    try:
+        with profiler if profiler is not None else contextlib.nullcontext():
+            if cprofile is not None:
+                cprofile.enable()
+            try:
+                yield profiler
+            finally:
+                if cprofile is not None:
+                    cprofile.disable()
+    finally:
+        if cprofile is not None:
+            cprofile.dump_stats(stats)
+        if profiler is not None:
+            if json_lines:
+                # all lines of this run can be told apart from other runs in the same file
+                profiler.write_json_lines(json_lines, run=time.strftime("%Y-%m-%dT%H:%M:%S"), pid=os.getpid(), **context)
+            if table:
+                from . import core
+                with contextlib.redirect_stdout(report if report is not None else sys.stdout):
+                    core.PrintDictAsTable(profiler.summary(), "Stage", "Time / peak memory")
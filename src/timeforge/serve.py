@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Serve timesheets over HTTP.
+
+`timeforge serve` starts a small HTTP/1.1 server which creates the timesheets on request, so a portal does not have to
+start a new process (and load the form template) for every single timesheet:
+
+    POST /timesheet     a JSON object with the keys of the internal dataset (see core.APP_Data, 'job' takes a single job
+                        description, 'jobs' a list of them), answered with the pdf document
+    GET  /stats         latency and throughput counters as JSON
+    GET  /health        answers 'ok' as long as the server is running
+
+The form template is loaded once when the server starts. The pdf documents are created by a pool of processes, every
+process receives the template when it is started and keeps its parsed copy and the holiday tables for its whole life.
+At most --max-pending timesheets are created or waiting at the same time, further requests are rejected immediately with
+503 Service Unavailable so the clients can retry later instead of piling up in the queue.
+
+A dataset is validated before it is sent to a process, so a process only receives timesheets which can be created. A
+timesheet which takes longer than --timeout seconds, or a process which dies, replaces the whole pool of processes.
+"""
+
+import asyncio
+import collections
+import configargparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date
+from http import HTTPStatus
+from . import batch
+from . import config
+from . import core
+from . import helpers
+from . import holidays
+from . import template
+
+
+# the largest accepted request body, a dataset is far smaller than this
+MAX_BODY_SIZE = 64 * 1024
+
+# the largest accepted number of header lines and their total size, a client sends a handful of short headers
+MAX_HEADERS = 100
+MAX_HEADER_SIZE = 16 * 1024
+
+# the parsed template of the current worker process, set up by _init_worker()
+_form_template = None
+
+
+def _worker_processes(executor) -> list:
+    # ProcessPoolExecutor offers no public access to its processes. The private mapping of process ids to processes
+    # was checked against CPython 3.11, if it is missing the old pool is only shut down and a hanging process keeps
+    # running until its timesheet is done
+    processes = getattr(executor, "_processes", None)
+    return list(processes.values()) if isinstance(processes, dict) else []
+
+
+def _init_worker(content):
+    global _form_template
+    _form_template = template.parse(content)
+    # forked worker processes inherit the state of the random number generator, see batch._init_worker()
+    random.seed()
+    # calculate the holidays of the years which are requested most of the time before the first request arrives
+    year = date.today().year
+    for y in (year - 1, year, year + 1):
+        holidays.get(y)
+
+
+def _warm_up():
+    # an empty task, submitting it starts a worker process
+    pass
+
+
+def _validate(fields: dict) -> core.APP_Data:
+    # check the dataset in the event loop before it is sent to a process: the keys and values (see batch.read_row()) and
+    # whether the working time fits into the month, so the process creates the timesheet in a bounded time
+    user_input = batch.read_row(fields)
+    if len(missing := user_input.missing_keys() - user_input.misc_keys) != 0:
+        raise RuntimeError(f"Missing keys in the internal dataset, cannot generate pdf: {missing}")
+    year = user_input.get("year")
+    if not date.min.year <= year <= date.max.year:
+        raise ValueError(f"Year must be between {date.min.year} and {date.max.year}")
+    month = helpers.Month_Dataset(year, user_input.get("month"), user_input.get("time"), None, holidays.get(year), generate=False)
+    month.check_work_hours(len(month.workdays()))
+    return user_input
+
+
+def _render_task(user_input: core.APP_Data) -> tuple[bool, bytes | str]:
+    # invalid datasets are returned as text, any other exception is an error of the server
+    try:
+        return True, core.RenderTimesheet(user_input, form_template=_form_template)
+    except (KeyError, ValueError, TypeError, RuntimeError) as e:
+        return False, str(e)
+
+
+class Statistics:
+    """
+    Latency and throughput counters of the server
+
+    Parameters
+    ----------
+    window : int
+        The number of the latest timesheets which are used to calculate the latency percentiles
+    """
+
+    def __init__(self, window: int = 1000):
+        self.started = time.monotonic()
+        self.created = 0        # timesheets which were sent to a client
+        self.failed = 0         # invalid requests and errors of the server
+        self.rejected = 0       # requests which were rejected because too many timesheets were pending
+        self.restarts = 0       # replaced pools of worker processes, after a timeout or a process which died
+        self.pending = 0        # timesheets which are created or waiting for a worker right now
+        self.total_latency = 0.0
+        self.latest = collections.deque(maxlen=window)  # (time of the answer, latency) of the latest timesheets
+
+    def record(self, latency: float):
+        """
+        Count a created timesheet
+
+        Parameters
+        ----------
+        latency : float
+            The time in seconds from receiving the request until the pdf document was ready
+        """
+        self.created += 1
+        self.total_latency += latency
+        self.latest.append((time.monotonic(), latency))
+
+    def to_dict(self) -> dict:
+        """
+        Summarise the counters
+
+        Returns
+        -------
+        statistics : dict
+            The counters, the throughput in timesheets per second (since the start and in the last minute) and the
+            latency in milliseconds
+        """
+        now = time.monotonic()
+        uptime = now - self.started
+        latencies = sorted(latency for _, latency in self.latest)
+
+        def percentile(p):
+            return round(1000 * latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3) if latencies else None
+
+        return {
+            "uptime": round(uptime, 3),
+            "created": self.created,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "restarts": self.restarts,
+            "pending": self.pending,
+            "throughput": round(self.created / uptime, 3) if uptime > 0 else 0.0,
+            "throughput_1min": round(sum(1 for t, _ in self.latest if now - t <= 60) / min(60, uptime), 3) if uptime > 0 else 0.0,
+            "latency": {
+                "mean": round(1000 * self.total_latency / self.created, 3) if self.created else None,
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(1000 * latencies[-1], 3) if latencies else None,
+            },
+        }
+
+
+class Server:
+    """
+    The HTTP server for the timesheets
+
+    Parameters
+    ----------
+    content : bytes | mmap.mmap
+        The content of the form template (see core.LoadTemplate())
+    jobs : int
+        The number of processes which create the pdf documents
+    max_pending : int
+        The number of timesheets which can be created or wait for a process at the same time
+    verbose : bool
+        Print every request to stderr
+    timeout : float
+        The number of seconds a timesheet may take, the pool of processes is replaced when it takes longer
+    """
+
+    def __init__(self, content, jobs: int, max_pending: int, verbose: bool = False, timeout: float = config.SERVE_TIMEOUT):
+        # a memory mapped template cannot be sent to other processes, they get a copy of its content instead
+        self.content = bytes(content)
+        self.jobs = jobs
+        self.executor = self.start_workers()
+        self.max_pending = max_pending
+        self.verbose = verbose
+        self.timeout = timeout
+        self.statistics = Statistics()
+
+    def start_workers(self):
+        """
+        Create a pool of worker processes, the processes are started when the first tasks are submitted
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        return ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker, initargs=(self.content,))
+
+    def restart_workers(self, executor):
+        """
+        Replace a pool of worker processes which is broken (a process died) or hangs (a timesheet took longer than the
+        timeout). The processes of the old pool are terminated, the timesheets which are still pending in it fail
+
+        Parameters
+        ----------
+        executor : concurrent.futures.ProcessPoolExecutor
+            The pool which failed, nothing happens if another request has already replaced it
+        """
+        if self.executor is not executor:
+            return
+        self.statistics.restarts += 1
+        self.executor = self.start_workers()
+        # a running task cannot be cancelled, its process has to be terminated
+        for process in _worker_processes(executor):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def serve(self, host: str, port: int):
+        """
+        Start the worker processes and answer requests until the task is cancelled
+
+        Parameters
+        ----------
+        host : str
+            The address to listen on
+        port : int
+            The port to listen on, 0 picks a free port
+        """
+        # start the worker processes before the first request arrives, so it does not have to wait for them
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _warm_up) for _ in range(self.jobs)))
+
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        for socket in server.sockets:
+            address, port = socket.getsockname()[:2]
+            print(f"Serving timesheets on http://{address}:{port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+    def shutdown(self):
+        """
+        Stop the worker processes
+        """
+        self.executor.shutdown(cancel_futures=True)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # answer the requests of one connection one after the other until the client closes it
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.respond(writer, HTTPStatus.BAD_REQUEST, self.error("Malformed request line"), keep_alive=False)
+                    break
+
+                headers = dict()
+                count, size = 0, 0
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    count, size = count + 1, size + len(line)
+                    if count > MAX_HEADERS or size > MAX_HEADER_SIZE:
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if count > MAX_HEADERS or size > MAX_HEADER_SIZE:
+                    message = f"The request may have at most {MAX_HEADERS} headers with at most {MAX_HEADER_SIZE} bytes"
+                    await self.respond(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, self.error(message), keep_alive=False)
+                    break
+
+                if "transfer-encoding" in headers:
+                    await self.respond(writer, HTTPStatus.LENGTH_REQUIRED, self.error("Chunked requests are not supported"), keep_alive=False)
+                    break
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY_SIZE:
+                    await self.respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, self.error(f"The request body must be at most {MAX_BODY_SIZE} bytes"), keep_alive=False)
+                    break
+                body = await reader.readexactly(length)
+
+                start = time.perf_counter()
+                status, response, extra_headers = await self.dispatch(method, target.partition("?")[0], body)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self.respond(writer, status, response, keep_alive, extra_headers)
+                if self.verbose:
+                    print(f"{method} {target} {status.value} {1000 * (time.perf_counter() - start):.1f} ms", file=sys.stderr)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass    # the client went away or sent a line longer than the buffer of the stream reader
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    def error(message: str) -> tuple[str, bytes]:
+        return "application/json", json.dumps({"error": message}).encode("utf-8")
+
+    @staticmethod
+    async def respond(writer: asyncio.StreamWriter, status: HTTPStatus, response: tuple[str, bytes], keep_alive: bool = True, extra_headers: dict | None = None):
+        content_type, body = response
+        head = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        head.extend(f"{name}: {value}" for name, value in (extra_headers or dict()).items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        writer.write(body)
+        await writer.drain()
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> tuple[HTTPStatus, tuple[str, bytes], dict | None]:
+        """
+        Answer a request
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method
+        path : str
+            The requested path without the query
+        body : bytes
+            The body of the request
+
+        Returns
+        -------
+        status : HTTPStatus
+            The status of the answer
+        response : tuple[str, bytes]
+            The content type and the body of the answer
+        headers : dict | None
+            Additional headers of the answer
+        """
+        routes = {
+            "/timesheet": ("POST", self.timesheet),
+            "/stats": ("GET", self.stats),
+            "/health": ("GET", self.health),
+        }
+        if path not in routes:
+            return HTTPStatus.NOT_FOUND, self.error(f"Unknown path {path}"), None
+        allowed, handler = routes[path]
+        if method != allowed:
+            return HTTPStatus.METHOD_NOT_ALLOWED, self.error(f"Use {allowed} for {path}"), {"Allow": allowed}
+        return await handler(body)
+
+    async def health(self, body: bytes):
+        return HTTPStatus.OK, ("text/plain", b"ok"), None
+
+    async def stats(self, body: bytes):
+        return HTTPStatus.OK, ("application/json", json.dumps(self.statistics.to_dict()).encode("utf-8")), None
+
+    async def timesheet(self, body: bytes):
+        start = time.perf_counter()
+        # backpressure: reject the request right away instead of letting the queue of the process pool grow
+        if self.statistics.pending >= self.max_pending:
+            self.statistics.rejected += 1
+            return HTTPStatus.SERVICE_UNAVAILABLE, self.error("Too many pending timesheets, try again later"), {"Retry-After": "1"}
+
+        try:
+            fields = json.loads(body)
+        except ValueError:
+            fields = None
+        if not isinstance(fields, dict):
+            self.statistics.failed += 1
+            return HTTPStatus.BAD_REQUEST, self.error("The request body must be a JSON object"), None
+        try:
+            user_input = _validate(fields)
+        except (KeyError, ValueError, TypeError, RuntimeError) as e:
+            self.statistics.failed += 1
+            return HTTPStatus.BAD_REQUEST, self.error(str(e)), None
+
+        from concurrent.futures.process import BrokenProcessPool
+
+        executor = self.executor
+        self.statistics.pending += 1
+        try:
+            success, result = await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(executor, _render_task, user_input), self.timeout)
+        except asyncio.TimeoutError:
+            self.statistics.failed += 1
+            self.restart_workers(executor)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, self.error(f"Creating the timesheet took longer than {self.timeout} seconds"), None
+        except BrokenProcessPool:
+            # a process of the pool died, e.g. killed because it ran out of memory
+            self.statistics.failed += 1
+            self.restart_workers(executor)
+            return HTTPStatus.SERVICE_UNAVAILABLE, self.error("A worker process died, try again later"), {"Retry-After": "1"}
+        except Exception as e:
+            self.statistics.failed += 1
+            return HTTPStatus.INTERNAL_SERVER_ERROR, self.error(f"Cannot create the timesheet: {e}"), None
+        finally:
+            self.statistics.pending -= 1
+
+        if not success:
+            self.statistics.failed += 1
+            return HTTPStatus.BAD_REQUEST, self.error(result), None
+        self.statistics.record(time.perf_counter() - start)
+        return HTTPStatus.OK, ("application/pdf", result), None
+
+
+def main(argv: list[str] | None = None):
+    """
+    The entry point for `timeforge serve`
+    """
+    parser = configargparse.ArgParser(
+        prog='TimeForge serve',
+        description='Create timesheets on request over HTTP: POST the dataset as JSON to /timesheet and receive the pdf document',
+        epilog='GET /stats returns latency and throughput counters, GET /health can be used for health checks.')
+    parser.add('--host', type=str, default='127.0.0.1', help='the address to listen on')
+    parser.add('--port', type=int, default=8000, help='the port to listen on, 0 picks a free port')
+    parser.add('--jobs', type=int, default=0, metavar='N', help='number of processes which create the timesheets, 0 uses all CPU cores')
+    parser.add('--max-pending', type=int, default=0, metavar='N', help='number of timesheets which can wait for a process before further requests are rejected, 0 means four per process')
+    parser.add('--template', type=str, metavar='PATH', help='use a local PDF file as form template instead of the form from the PSE homepage')
+    parser.add('--offline', action='store_true', help='never download the form template, only use the cached copy')
+    parser.add('--cache-ttl', type=float, default=config.TEMPLATE_CACHE_TTL, metavar='SECONDS', help='how long the cached form template is used before the server is asked for a newer version')
+    parser.add('--timeout', type=float, default=config.SERVE_TIMEOUT, metavar='SECONDS', help='how long a timesheet may take before the worker processes are restarted and the request fails')
+    parser.add('-v', '--verbose', action='store_true', help='print every request')
+    args = parser.parse_args(argv)
+
+    content = core.LoadTemplate(args.template, args.offline, args.cache_ttl)
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+    max_pending = args.max_pending if args.max_pending > 0 else 4 * jobs
+
+    server = Server(content, jobs, max_pending, args.verbose, args.timeout)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
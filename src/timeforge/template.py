@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Provide the PDF form template.
+
+The form is downloaded from the PSE homepage only when necessary. Every downloaded version is stored content-addressed
+(the file name is the sha256 hash of its content) in the cache directory and an index file remembers which version belongs
+to which URL together with the HTTP validators (ETag / Last-Modified) to revalidate it cheaply. Downloads are streamed
+into the cache in chunks and cached templates are memory-mapped, so the content of a template is never copied around
+in memory.
+
+The form fields of a template are indexed once (see FormTemplate) and the index is stored next to the cached template,
+so later runs do not have to walk through the AcroForm again.
+"""
+
+import hashlib
+import io
+import json
+import mmap
+import os
+import time
+from typing import TYPE_CHECKING
+from . import config
+
+# requests and pypdf are imported when they are needed for the first time, a cached template never needs requests
+if TYPE_CHECKING:
+    from pypdf.generic import DictionaryObject
+
+
+# the size of the chunks in which a template is downloaded
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# templates which were already loaded by this process, so a batch run never touches the disk or the network twice
+_loaded: dict = {}
+
+# the checksums of the contents returned by load(), so parse() does not hash them again. The content is stored next to
+# its checksum, this keeps the object alive and its id cannot be reused by another object
+_checksums: dict = {}
+
+
+def _remember(url: str, content: bytes | mmap.mmap, sha256: str) -> bytes | mmap.mmap:
+    _loaded[url] = content
+    _checksums[id(content)] = (content, sha256)
+    return content
+
+
+def checksum(content: bytes | mmap.mmap) -> str:
+    """
+    Return the sha256 checksum of a template, the content is only hashed if it was not returned by load()
+
+    Parameters
+    ----------
+    content : bytes | mmap.mmap
+        The content of the PDF file
+
+    Returns
+    -------
+    sha256 : str
+        The checksum as hexadecimal string
+    """
+    known = _checksums.get(id(content))
+    if known is not None and known[0] is content:
+        return known[1]
+    return hashlib.sha256(content).hexdigest()
+
+
+def cache_dir() -> str:
+    """
+    Return the directory where the templates are cached, following the XDG base directory specification
+
+    Returns
+    -------
+    path : str
+        $XDG_CACHE_HOME/timeforge, which defaults to ~/.cache/timeforge
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "timeforge")
+
+
+def _read_index(directory: str) -> dict:
+    try:
+        with open(os.path.join(directory, "index.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # no index yet or a broken one: behave like an empty cache
+        return {}
+
+
+def _write_atomic(path: str, content: bytes):
+    # write to a temporary file first so a crash never leaves a half written file in the cache
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(content)
+    os.replace(temp_path, path)
+
+
+def _map_file(path: str) -> bytes | mmap.mmap:
+    # map the file into memory instead of reading it, the map stays valid after the file has been closed
+    with open(path, "rb") as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files cannot be mapped
+            return f.read()
+
+
+def _read_blob(directory: str, entry: dict) -> bytes | mmap.mmap | None:
+    try:
+        content = _map_file(os.path.join(directory, entry["sha256"] + ".pdf"))
+    except (OSError, KeyError):
+        return None
+    # the file name is the checksum of the content, a mismatch means the cached file is corrupted
+    if hashlib.sha256(content).hexdigest() != entry["sha256"]:
+        return None
+    return content
+
+
+def _download(response, directory: str) -> tuple[bytes | mmap.mmap, str]:
+    # stream the response into the cache directory (or into memory if the cache is not writable) and calculate the
+    # checksum on the way. Returns the content and its sha256 checksum
+    try:
+        os.makedirs(directory, exist_ok=True)
+        temp_path = os.path.join(directory, f"download.{os.getpid()}.tmp")
+        target = open(temp_path, "wb")
+    except OSError:
+        temp_path, target = None, io.BytesIO()
+
+    digest = hashlib.sha256()
+    length = 0
+    try:
+        with target:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                target.write(chunk)
+                length += len(chunk)
+            content = target.getvalue() if temp_path is None else None
+
+        # without a content encoding the size of the received data must match the announced size
+        expected = response.headers.get("Content-Length")
+        if "Content-Encoding" not in response.headers and expected is not None and int(expected) != length:
+            raise RuntimeError(f"Incomplete download: received {length} of {expected} bytes")
+    except BaseException:
+        if temp_path is not None:
+            os.remove(temp_path)
+        raise
+
+    sha256 = digest.hexdigest()
+    if temp_path is not None:
+        path = os.path.join(directory, sha256 + ".pdf")
+        os.replace(temp_path, path)
+        content = _map_file(path)
+    return content, sha256
+
+
+def load(url: str = config.MILOG_FORM_URL, path: str | None = None, offline: bool = False, ttl: float = config.TEMPLATE_CACHE_TTL) -> bytes | mmap.mmap:
+    """
+    Get the content of the PDF form template
+
+    Parameters
+    ----------
+    url : str
+        The URL from where the template will be downloaded
+    path : str, optional
+        A local PDF file which should be used instead of the online form. The cache is bypassed completely in this case
+    offline : bool
+        Only use the cached template and never connect to the internet
+    ttl : float
+        The time in seconds for which a cached template will be used without asking the server whether there is a newer version
+
+    Raises
+    ------
+    RuntimeError :
+        If the template is neither in the cache nor can be downloaded
+
+    Returns
+    -------
+    content : bytes | mmap.mmap
+        The content of the PDF file, a read-only memory map for files on the disk
+    """
+    if path is not None:
+        return _map_file(os.path.expanduser(path))
+
+    if url in _loaded:
+        return _loaded[url]
+
+    directory = cache_dir()
+    index = _read_index(directory)
+    entry = index.get(url, {})
+    cached = _read_blob(directory, entry) if entry else None
+
+    if cached is not None and (offline or time.time() - entry.get("fetched", 0) < ttl):
+        return _remember(url, cached, entry["sha256"])
+    if offline:
+        raise RuntimeError(f"The template {url} is not in the cache at {directory}, cannot work offline")
+
+    # the cached version is outdated (or missing): ask the server, but only transfer the file if it has changed
+    headers = dict()
+    if cached is not None:
+        if "etag" in entry:
+            headers["If-None-Match"] = entry["etag"]
+        if "last_modified" in entry:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    import requests
+    try:
+        with requests.get(url, headers=headers, allow_redirects=True, timeout=30, stream=True) as r:
+            r.raise_for_status()
+            if r.status_code == 304 and cached is not None:
+                content, sha256 = cached, entry["sha256"]
+            else:
+                content, sha256 = _download(r, directory)
+                entry = {"sha256": sha256}
+                for header, key in (("ETag", "etag"), ("Last-Modified", "last_modified")):
+                    if header in r.headers:
+                        entry[key] = r.headers[header]
+    except Exception as e:
+        if cached is None:
+            raise RuntimeError(f"Exception when downloading PSE-Hiwi Formular -> {e}")
+        # the network is not available but there is an outdated copy in the cache which is good enough
+        return _remember(url, cached, entry["sha256"])
+
+    entry["fetched"] = time.time()
+    index[url] = entry
+    try:
+        os.makedirs(directory, exist_ok=True)
+        _write_atomic(os.path.join(directory, "index.json"), json.dumps(index, indent=4).encode("utf-8"))
+    except OSError:
+        pass    # a read-only cache directory should not prevent creating the timesheet
+
+    return _remember(url, content, sha256)
+
+
+def field_of_widget(annotation: "DictionaryObject") -> "DictionaryObject":
+    """
+    Get the form field which belongs to a widget annotation, in the same way as pypdf does when filling out the form
+
+    Parameters
+    ----------
+    annotation : DictionaryObject
+        A widget annotation of a page
+
+    Returns
+    -------
+    field : DictionaryObject
+        The annotation itself or, if the field has several widgets, its parent
+    """
+    from pypdf.generic import DictionaryObject
+
+    if "/FT" in annotation and "/T" in annotation:
+        return annotation
+    return annotation.get("/Parent", DictionaryObject()).get_object()
+
+
+class FormTemplate:
+    """
+    A parsed PDF form together with an index of its fields.
+
+    The index maps every field name to the type of the field and its widgets. Every widget is described by the number
+    of its page, its position in the /Annots array of that page and its rectangle. Copies of the document made with
+    PdfWriter(clone_from=...) keep pages and annotations in the same order, so the index can be used to find the
+    widgets in every output document without searching.
+
+    Iterating over a FormTemplate or using `in` works on the names of the text fields, like the dictionary returned by
+    PdfReader.get_form_text_fields().
+
+    The table of the form has a limited number of rows. Longer months are continued on copies of the page with the
+    table (see core.AddTablePages()), the fields on the copies are renamed with continuation_name().
+
+    Parameters
+    ----------
+    content : bytes | mmap.mmap
+        The content of the PDF file
+    fields : dict, optional
+        A previously created index (see to_dict()). If it is missing the index will be created from the document
+    sha256 : str, optional
+        The checksum of the content if it is already known (see checksum()), otherwise it is calculated
+    """
+
+    # the names of the fields in one row of the table, the row number starts at 1
+    ROW_FIELDS = (
+        "Tätigkeit Stichwort ProjektRow{}",     # job description
+        "ttmmjjRow{}",                          # date
+        "hhmmRow{}",                            # start time
+        "hhmmRow{}_2",                          # end time
+        "hhmmRow{}_3",                          # pause
+        "hhmmRow{}_4",                          # working hours
+    )
+
+    def __init__(self, content: bytes | mmap.mmap, fields: dict | None = None, sha256: str | None = None):
+        from pypdf import PdfReader
+
+        self.content = content
+        self.sha256 = sha256 if sha256 is not None else hashlib.sha256(content).hexdigest()
+        # a memory map can be read directly, bytes need a file-like object around them (BytesIO does not copy bytes)
+        self.reader = PdfReader(content if isinstance(content, mmap.mmap) else io.BytesIO(content))
+        self.fields = fields if fields is not None else self._index_fields()
+        self._text_fields = {name for name, field in self.fields.items() if field["type"] == "/Tx"}
+        self.rows = self._count_rows()
+        # the page which contains the table, it is copied when the working days do not fit into the table
+        self.table_page = self.fields[self.row_fields(1)[0]]["widgets"][0]["page"] if self.rows > 0 else None
+
+    def _index_fields(self) -> dict:
+        fields = dict()
+        for page_number, page in enumerate(self.reader.pages):
+            for position, reference in enumerate(page.get("/Annots", [])):
+                annotation = reference.get_object()
+                if annotation.get("/Subtype") != "/Widget":
+                    continue
+                field = field_of_widget(annotation)
+                if "/T" not in field:
+                    continue
+                entry = fields.setdefault(str(field["/T"]), {"type": str(field.get("/FT", "")), "widgets": []})
+                entry["widgets"].append({
+                    "page": page_number,
+                    "annotation": position,
+                    "rect": [float(i) for i in annotation.get("/Rect", [])],
+                })
+        return fields
+
+    def _count_rows(self) -> int:
+        rows = 0
+        while all(name.format(rows + 1) in self._text_fields for name in self.ROW_FIELDS):
+            rows += 1
+        return rows
+
+    @staticmethod
+    def continuation_name(name: str, copy: int) -> str:
+        """
+        Get the name of a field on a copy of the page with the table
+
+        Parameters
+        ----------
+        name : str
+            The name of the field in the form
+        copy : int
+            The number of the table page, starting at 1 for the page of the form itself
+
+        Returns
+        -------
+        name : str
+            The name of the field on this page, e.g. 'ttmmjjRow1 #2' on the second page. The form itself keeps its names
+        """
+        # a '.' would separate the levels of the field hierarchy and '_2' is already used by the form, so the number of the page
+        # is appended with '#'
+        return name if copy == 1 else f"{name} #{copy}"
+
+    @classmethod
+    def row_fields(cls, row: int, copy: int = 1) -> tuple:
+        """
+        Get the names of the fields in a row of the table
+
+        Parameters
+        ----------
+        row : int
+            The number of the row, starting at 1
+        copy : int
+            The number of the table page, see continuation_name()
+
+        Returns
+        -------
+        names : tuple
+            job description, date, start time, end time, pause and working hours
+        """
+        return tuple(cls.continuation_name(name.format(row), copy) for name in cls.ROW_FIELDS)
+
+    def table_page_fields(self) -> list[str]:
+        """
+        Get the names of the text fields on the page with the table
+
+        Returns
+        -------
+        names : list[str]
+            The text fields which have a widget on this page
+        """
+        # in the order of the index (and not of the set of text fields), so the same data always creates the same document
+        return [name for name, field in self.fields.items() if name in self._text_fields and any(w["page"] == self.table_page for w in field["widgets"])]
+
+    def __contains__(self, name) -> bool:
+        return name in self._text_fields
+
+    def __iter__(self):
+        return iter(self._text_fields)
+
+    def __len__(self) -> int:
+        return len(self._text_fields)
+
+    def to_dict(self) -> dict:
+        """
+        Serialise the index so it can be stored as JSON
+
+        Returns
+        -------
+        index : dict
+            The checksum of the template and the index of the fields
+        """
+        return {"sha256": self.sha256, "fields": self.fields}
+
+
+# templates which were already parsed by this process, keyed by their checksum
+_parsed: dict = {}
+
+
+def parse(content: bytes | mmap.mmap) -> FormTemplate:
+    """
+    Parse a template. The index of the form fields is taken from the cache directory if it exists there, otherwise it
+    will be created and stored in the cache for the next run
+
+    Parameters
+    ----------
+    content : bytes | mmap.mmap
+        The content of the PDF file
+
+    Returns
+    -------
+    form_template : FormTemplate
+        The parsed template
+    """
+    sha256 = checksum(content)
+    if sha256 in _parsed:
+        return _parsed[sha256]
+
+    index_path = os.path.join(cache_dir(), sha256 + ".fields.json")
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index["sha256"] != sha256:
+            raise ValueError("index belongs to another template")
+        form_template = FormTemplate(content, index["fields"], sha256)
+    except (OSError, ValueError, KeyError, TypeError):
+        form_template = FormTemplate(content, sha256=sha256)
+        try:
+            os.makedirs(cache_dir(), exist_ok=True)
+            _write_atomic(index_path, json.dumps(form_template.to_dict(), ensure_ascii=False).encode("utf-8"))
+        except OSError:
+            pass    # the index is only an optimisation, it is not needed to create the timesheet
+
+    _parsed[sha256] = form_template
+    return form_template
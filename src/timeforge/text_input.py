@@ -11,6 +11,32 @@
 import curses
 
 
+def read_key(window: curses.window) -> str | int:
+    """
+    Wait for the next keystroke and bring the screen up to date before.
+    The widgets only mark their windows for an update (`noutrefresh()`), the terminal is updated with a single `curses.doupdate()` once all keys which already arrived are handled. So a burst of keys (e.g. pasted text or a slow SSH connection delivering many keys at once) is drawn once and not after every key
+
+    Parameters
+    ----------
+    window : curses.window
+        The window to read the keystrokes from, in general stdscr
+
+    Returns
+    -------
+    key : str, int
+        The return value of window.get_wch()
+    """
+    window.nodelay(True)
+    try:
+        # a key which is already waiting is handled without drawing the screen in between
+        return window.get_wch()
+    except curses.error:
+        # no more input: draw all the changes at once and wait for the next key
+        curses.doupdate()
+        window.nodelay(False)
+        return window.get_wch()
+
+
 class textfield:
     """
     A class to handle a curses input field
@@ -37,15 +63,15 @@ class textfield:
         self.colors = colors
         self.window.bkgd(self.colors)
 
+        # the content of the window has to be drawn again
+        self.dirty = True
         self.draw()
 
     def draw(self):
         """
         This function draws the text field with its content and the cursor.
-        It is mostly used to draw the initial state and redraw it after every update
+        It is mostly used to draw the initial state and redraw it after every update. The content is only drawn again when it has changed, the window is marked for the next update of the screen (see `read_key()`)
         """
-        self.window.clear()
-
         # first try to draw the whole text into the window. Assume that it fits in there
         str_start = 0
         str_end = len(self.content)
@@ -77,10 +103,14 @@ class textfield:
                 str_start = self.cursor_position - center
                 str_end = str_start + (self.window_length)
 
-        self.window.insstr(0, 0, self.content[str_start:str_end])
+        if self.dirty:
+            # erase() instead of clear(): clear() forces curses to repaint the whole terminal with the next update
+            self.window.erase()
+            self.window.insstr(0, 0, self.content[str_start:str_end])
+            self.dirty = False
         self.window.move(0, draw_cursor_at)
 
-        self.window.refresh()
+        self.window.noutrefresh()
 
     def add(self, insert: str) -> None:
         """
@@ -96,6 +126,7 @@ class textfield:
         self.cursor_position += len(insert)
 
         # update view
+        self.dirty = True
         self.draw()
 
         # return a None object because this keystroke was handled and there are no more operations needed
@@ -113,6 +144,7 @@ class textfield:
             return curses.KEY_BACKSPACE
 
         # update view
+        self.dirty = True
         self.draw()
 
         # return a None object because this keystroke was handled and there are no more operations needed
@@ -133,6 +165,8 @@ class textfield:
         # move cursor to right
         if self.cursor_position < len(self.content):
             self.cursor_position += 1
+            # the visible part of a long content might have moved
+            self.dirty = True
             self.draw()
             return None
         else:
@@ -144,6 +178,7 @@ class textfield:
         Move the cursor to the end of the string
         """
         self.cursor_position = len(self.content)
+        self.dirty = True
 
     def move_cursor_left(self) -> None | int:
         """
@@ -160,6 +195,8 @@ class textfield:
         # move cursor to left
         if self.cursor_position > 0:
             self.cursor_position -= 1
+            # the visible part of a long content might have moved
+            self.dirty = True
             self.draw()
             return None
         else:
@@ -227,15 +264,16 @@ class textfield_fixed(textfield):
     def draw(self) -> None:
         """
         This function draws the text field with its content and the cursor.
-        It is mostly used to draw the initial state and redraw it after every update
+        It is mostly used to draw the initial state and redraw it after every update. The content is only drawn again when it has changed, the window is marked for the next update of the screen (see `read_key()`)
         """
-        self.window.clear()
-
-        self.window.insstr(0, 0, self.content)
+        if self.dirty:
+            self.window.erase()
+            self.window.insstr(0, 0, self.content)
+            self.dirty = False
         if (self.cursor_position < self.window_length):
             self.window.move(0, self.cursor_position)
 
-        self.window.refresh()
+        self.window.noutrefresh()
 
     def add(self, insert: str) -> None:
         """
@@ -251,6 +289,7 @@ class textfield_fixed(textfield):
         self.cursor_position += len(insert)
 
         # update view
+        self.dirty = True
         self.draw()
 
         if len(self.content) >= self.window_length:
@@ -272,6 +311,7 @@ class textfield_fixed(textfield):
             return curses.KEY_BACKSPACE
 
         # update view
+        self.dirty = True
         self.draw()
 
         # return a None object because this keystroke was handled and there are no more operations needed
@@ -292,6 +332,8 @@ class textfield_fixed(textfield):
         # move cursor to right
         if self.cursor_position < len(self.content) - 1:
             self.cursor_position += 1
+            # the visible part of a long content might have moved
+            self.dirty = True
             self.draw()
             return None
         else:
@@ -321,15 +363,18 @@ class button:
         self.colors = colors
         self.window.bkgd(self.colors)
 
+        self.dirty = True
         self.deactivate()
         self.draw()
 
     def draw(self):
         """
-        Draw the button
+        Draw the button, the window is marked for the next update of the screen (see `read_key()`)
         """
-        self.window.insstr(0, 0, "< " + self.text + " >")
-        self.window.refresh()
+        if self.dirty:
+            self.window.insstr(0, 0, "< " + self.text + " >")
+            self.dirty = False
+        self.window.noutrefresh()
 
     def deactivate(self):
         """
@@ -337,6 +382,7 @@ class button:
         """
         curses.curs_set(1)
         self.window.attron(curses.A_REVERSE)
+        self.dirty = True
         self.draw()
 
     def activate(self):
@@ -345,6 +391,7 @@ class button:
         """
         curses.curs_set(0)
         self.window.attroff(curses.A_REVERSE)
+        self.dirty = True
         self.draw()
 
     def input(self, in_char):
@@ -440,10 +487,12 @@ if __name__ == "__main__":
             button(curses.newwin(1, 8, 12, 15), COLORS, "Exit")
         ]
 
-        stdscr.refresh()
+        stdscr.noutrefresh()
 
         # draw all the text-fields and the button so they are visible
+        # (stdscr was drawn over them, so their content has to be drawn again)
         for i in forms:
+            i.dirty = True
             i.draw()
 
         current_field = forms[0]    # first text field should be set as starting point
@@ -451,7 +500,7 @@ if __name__ == "__main__":
 
         # this loop handles all the input events
         while True:
-            key = current_field.input(stdscr.get_wch())
+            key = current_field.input(read_key(stdscr))
 
             if isinstance(current_field, button):
                 current_field.deactivate()